@@ -4,20 +4,68 @@ from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 from collections import Counter
 import re
+import json
+import asyncio
+import hashlib
+import threading
 import numpy as np
-from typing import Dict, List
+import pandas as pd
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import quote
 from database import Database
+from dimensions import canonicalize_area
+from archive import ArchiveManager
+from sketches import SketchStore
+from dedupe import dedupe_by_cluster
 import os
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
 plt.rcParams['axes.unicode_minus'] = False
 
+# 常见技能关键词
+SKILL_KEYWORDS = [
+    'Python', 'Java', 'JavaScript', 'TypeScript', 'Go', 'C++', 'C#',
+    'React', 'Vue', 'Angular', 'Node.js', 'Spring', 'Django', 'Flask',
+    'MySQL', 'PostgreSQL', 'MongoDB', 'Redis', 'Elasticsearch',
+    'Docker', 'Kubernetes', 'AWS', 'Azure', 'Linux',
+    'TensorFlow', 'PyTorch', '机器学习', '深度学习', '数据分析'
+]
+
+# 词云过滤的停用词
+CLOUD_STOPWORDS = {'的', '了', '和', '是', '就', '都', '而', '及', '与', '或', '等', '在', '有', '为', '可', '能', '要', '会', '可以', '这个', '那个', '一个'}
+
+class JobSummary:
+    """岗位数据的增量汇总结果：计数、薪资和词频按批次累加，只保留前N条岗位"""
+    
+    def __init__(self):
+        self.total = 0
+        self.jobs = []  # 前N条岗位，用于列表展示
+        self.latest_crawl = ''
+        self.max_id = 0
+        self.min_crawl = None
+        self.max_crawl = None
+        self.companies = set()
+        self.salaries = []
+        self.area_counter = Counter()
+        self.exp_counter = Counter()
+        self.edu_counter = Counter()
+        # 详细分析用的词频、技能计数和文本长度
+        self.word_freq = Counter()
+        self.company_words = {}
+        self.skill_counts = Counter()
+        self.text_length = 0
+        # 词云词频
+        self.cloud_freq = Counter()
+
 class DataAnalyzer:
     """数据分析类"""
     
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, archive: Optional[ArchiveManager] = None):
         self.db = db
+        self.archive = archive
+        self.sketches = SketchStore(db)
+        self._plot_lock = threading.Lock()
         # 初始化jieba
         jieba.initialize()
         # 添加IT行业常用词
@@ -36,98 +84,251 @@ class DataAnalyzer:
         for word in tech_words:
             jieba.add_word(word)
     
-    def get_statistics(self, keyword: str) -> Dict:
-        """获取基础统计信息"""
-        jobs = self.db.get_all_jobs(keyword)
+    def _iter_job_batches(self, keyword: str, include_archive: bool = False) -> Iterator[List[Dict]]:
+        """按批次读取岗位，默认只读取热数据，include_archive 时再流式扫描归档分区"""
+        # 热数据只读取岗位表中的整数维度ID，维度名称在取前N项时才查询
+        yield self.db.get_jobs_for_analysis(keyword)
+        if include_archive and self.archive:
+            yield from self.archive.iter_batches(keyword)
+    
+    def _summarize(self, keyword: str, include_archive: bool = False, dedupe: Optional[str] = None,
+                   text: bool = False, cloud: bool = False, head: int = 0) -> JobSummary:
+        """流式汇总岗位数据，逐批累加后丢弃岗位本身；dedupe='cluster' 时每个近似重复簇只保留一条"""
+        # text 统计详细分析所需的词频和技能，cloud 统计词云词频，head 为保留的前N条岗位
+        summary = JobSummary()
+        seen = set() if dedupe == 'cluster' else None
+        
+        for jobs in self._iter_job_batches(keyword, include_archive):
+            if seen is not None:
+                jobs = dedupe_by_cluster(jobs, seen)
+            if not jobs:
+                continue
+            
+            if not summary.total:
+                summary.latest_crawl = jobs[0].get('crawl_time', '')
+            summary.total += len(jobs)
+            summary.jobs.extend(jobs[:max(head - len(summary.jobs), 0)])
+            self._summarize_batch(summary, jobs)
+            if text or cloud:
+                self._summarize_text(summary, jobs, text, cloud)
+        
+        return summary
+    
+    def _summarize_batch(self, summary: JobSummary, jobs: List[Dict]):
+        """累加一批岗位的计数和薪资"""
+        for job in jobs:
+            summary.companies.add(self._dimension_key(job, 'company'))
+            area = self._dimension_key(job, 'area')
+            if area != '':
+                summary.area_counter[area] += 1
+            summary.exp_counter[self._dimension_key(job, 'experience')] += 1
+            summary.edu_counter[self._dimension_key(job, 'education')] += 1
+            
+            value = self._parse_salary(job.get('salary', ''))
+            if value is not None:
+                summary.salaries.append(value)
+            
+            summary.max_id = max(summary.max_id, job.get('id') or 0)
+            crawl_time = str(job.get('crawl_time') or '')
+            summary.min_crawl = min(summary.min_crawl, crawl_time) if summary.min_crawl is not None else crawl_time
+            summary.max_crawl = max(summary.max_crawl, crawl_time) if summary.max_crawl is not None else crawl_time
+    
+    def _summarize_text(self, summary: JobSummary, jobs: List[Dict], text: bool, cloud: bool):
+        """累加一批岗位的分词词频：标题+描述只分词一次，同时用于关键词提取和词云"""
+        tfidf = jieba.analyse.default_tfidf
+        company_names = self.db.get_dimension_names(
+            'company', list({job['company_id'] for job in jobs if job.get('company_id') is not None})
+        ) if text else {}
+        cloud_words = []
         
-        if not jobs:
+        for job in jobs:
+            title_text = f"{job.get('title', '')} {job.get('description', '')}"
+            words = list(jieba.cut(title_text))
+            
+            if text:
+                # 与 jieba.analyse.extract_tags 的过滤规则一致，公司名称单独分词并缓存
+                company = company_names.get(job.get('company_id'), job.get('company', '')) or ''
+                if company not in summary.company_words:
+                    summary.company_words[company] = list(jieba.cut(company))
+                for w in words + summary.company_words[company]:
+                    if len(w.strip()) < 2 or w.lower() in tfidf.stop_words:
+                        continue
+                    summary.word_freq[w] += 1
+                
+                row_text = f"{title_text} {company}"
+                summary.text_length += len(row_text)
+                row_lower = row_text.lower()
+                for skill in SKILL_KEYWORDS:
+                    summary.skill_counts[skill] += row_lower.count(skill.lower())
+            
+            if cloud:
+                cloud_words.extend(w for w in words if len(w) > 1 and w not in CLOUD_STOPWORDS and not w.isdigit())
+        
+        if cloud_words:
+            # 每批单独统计词频后累加，二元词组只在批内识别
+            summary.cloud_freq.update(WordCloud().process_text(" ".join(cloud_words)))
+    
+    def record_jobs(self, jobs: List[Dict]):
+        """新岗位入库后更新对应关键词、日期的统计草图"""
+        self.sketches.add([
+            {
+                "keyword": job.get('keyword', ''),
+                "day": (job.get('crawl_time') or '')[:10],
+                "company": job.get('company', ''),
+                "salary_value": self._parse_salary(job.get('salary', ''))
+            }
+            for job in jobs
+        ])
+    
+    def rebuild_sketches(self, keyword: Optional[str] = None):
+        """根据热数据和归档数据重建统计草图，keyword（精确匹配）为空时全部重建"""
+        self.db.delete_sketches(keyword)
+        self.record_jobs(self.db.get_all_jobs(keyword, exact=True))
+        if not self.archive:
+            return
+        
+        # 归档数据分批写入草图
+        for jobs in self.archive.iter_batches(keyword):
+            self.record_jobs([job for job in jobs if keyword is None or job.get('keyword') == keyword])
+    
+    def get_approx_statistics(self, keyword: str) -> Dict:
+        """基于统计草图的近似统计，耗时和内存与岗位数量无关（包含已归档的数据）"""
+        stats = self.sketches.summary(keyword)
+        if not stats["total_jobs"]:
+            return {
+                "total_jobs": 0,
+                "message": "暂无数据"
+            }
+        
+        stats["approx"] = True
+        return stats
+    
+    def get_approx_analysis(self, keyword: str) -> Dict:
+        """基于统计草图的近似分析，只包含薪资分位数"""
+        stats = self.sketches.summary(keyword)
+        if not stats["total_jobs"]:
+            return {"message": "暂无数据"}
+        
+        return {
+            "keyword": keyword,
+            "total_jobs": stats["total_jobs"],
+            "salary_range_analysis": stats["salary_statistics"],
+            "approx": True
+        }
+    
+    def get_statistics(self, keyword: str, include_archive: bool = False,
+                       dedupe: Optional[str] = None) -> Dict:
+        """获取基础统计信息"""
+        summary = self._summarize(keyword, include_archive, dedupe)
+        return self._statistics_from_summary(summary)
+    
+    def _statistics_from_summary(self, summary: JobSummary) -> Dict:
+        """根据汇总结果计算基础统计"""
+        if not summary.total:
             return {
                 "total_jobs": 0,
                 "message": "暂无数据"
             }
         
         # 基础统计
-        total_jobs = len(jobs)
-        companies = set([job.get('company', '') for job in jobs if job.get('company')])
+        total_jobs = summary.total
+        companies = summary.companies - {''}
         
         # 薪资分析
-        salary_stats = self._analyze_salary(jobs)
+        salary_stats = self._analyze_salary(summary.salaries)
         
         # 地区分布
-        area_dist = self._analyze_area(jobs)
+        area_dist = self._analyze_area(summary.area_counter)
+        city_dist = self._analyze_city(summary.area_counter)
         
         # 经验要求分布
-        exp_dist = self._analyze_experience(jobs)
+        exp_dist = self._analyze_experience(summary.exp_counter)
         
         # 学历要求分布
-        edu_dist = self._analyze_education(jobs)
+        edu_dist = self._analyze_education(summary.edu_counter)
         
         return {
             "total_jobs": total_jobs,
             "company_count": len(companies),
             "salary_statistics": salary_stats,
             "area_distribution": area_dist,
+            "city_distribution": city_dist,
             "experience_distribution": exp_dist,
             "education_distribution": edu_dist
         }
     
-    def get_detailed_analysis(self, keyword: str) -> Dict:
+    def get_detailed_analysis(self, keyword: str, include_archive: bool = False,
+                              dedupe: Optional[str] = None) -> Dict:
         """获取详细分析"""
-        jobs = self.db.get_all_jobs(keyword)
-        
-        if not jobs:
+        summary = self._summarize(keyword, include_archive, dedupe, text=True)
+        return self._analysis_from_summary(keyword, summary)
+    
+    def _analysis_from_summary(self, keyword: str, summary: JobSummary) -> Dict:
+        """根据汇总结果计算详细分析"""
+        if not summary.total:
             return {"message": "暂无数据"}
         
-        # 合并所有描述文本
-        all_text = " ".join([
-            f"{job.get('title', '')} {job.get('description', '')} {job.get('company', '')}"
-            for job in jobs
-        ])
-        
         # 关键词提取
-        keywords = self._extract_keywords(all_text)
+        keywords = self._extract_keywords(summary.word_freq)
         
-        # 技能需求分析
-        skills = self._analyze_skills(all_text)
+        # 技能需求分析（文本长度包含岗位之间的分隔符）
+        skills = self._analyze_skills(summary.skill_counts, summary.text_length + summary.total - 1)
         
         # 薪资范围分析
-        salary_range = self._analyze_salary_range(jobs)
+        salary_range = self._analyze_salary_range(summary.salaries)
         
         # 岗位趋势分析
-        trends = self._analyze_trends(jobs)
+        trends = self._analyze_trends(summary)
         
         return {
             "keyword": keyword,
-            "total_jobs": len(jobs),
+            "total_jobs": summary.total,
             "top_keywords": keywords,
             "required_skills": skills,
             "salary_range_analysis": salary_range,
             "trends": trends,
-            "analysis_time": str(jobs[0].get('crawl_time', '')) if jobs else ""
+            "analysis_time": str(summary.latest_crawl)
         }
     
-    def generate_wordcloud(self, keyword: str) -> str:
+    def generate_wordcloud(self, keyword: str, include_archive: bool = False) -> str:
         """生成词云图"""
-        jobs = self.db.get_all_jobs(keyword)
+        summary = self._summarize(keyword, include_archive, cloud=True)
         
-        if not jobs:
+        if not summary.total:
             raise ValueError("没有数据可以生成词云")
         
-        # 合并文本
-        text = " ".join([
-            f"{job.get('title', '')} {job.get('description', '')}"
-            for job in jobs
-        ])
-        
-        # 使用jieba分词
-        words = jieba.cut(text)
-        words_text = " ".join(words)
-        
-        # 过滤停用词和短词
-        stopwords = {'的', '了', '和', '是', '就', '都', '而', '及', '与', '或', '等', '在', '有', '为', '可', '能', '要', '会', '可以', '这个', '那个', '一个'}
-        filtered_words = [w for w in words if len(w) > 1 and w not in stopwords and not w.isdigit()]
-        words_text = " ".join(filtered_words)
-        
+        return self._render_wordcloud(keyword, summary.cloud_freq, f'static/wordclouds/{keyword}_wordcloud.png')
+    
+    def get_cached_wordcloud(self, keyword: str, summary: JobSummary, include_archive: bool = False,
+                             dedupe: Optional[str] = None) -> Optional[str]:
+        """按数据快照和查询选项缓存词云图，数据没有变化时直接返回已有图片的URL"""
+        if not summary.total:
+            return None
+        
+        # 是否包含归档、是否去重得到的词云不同，分别缓存
+        variant = ('all' if include_archive else 'hot') + (f'-{dedupe}' if dedupe else '')
+        fingerprint = hashlib.md5(json.dumps([
+            variant,
+            summary.total,
+            summary.max_id,
+            summary.min_crawl,
+            summary.max_crawl
+        ]).encode('utf-8')).hexdigest()[:12]
+        filename = f'{keyword}_{variant}_{fingerprint}.png'
+        image_path = os.path.join('static/wordclouds', filename)
+        
+        if not os.path.exists(image_path):
+            self._render_wordcloud(keyword, summary.cloud_freq, image_path)
+            # 只清理该关键词同一查询选项下过期的缓存图片
+            stale = re.compile(re.escape(f'{keyword}_{variant}_') + r'[0-9a-f]{12}\.png')
+            for name in os.listdir('static/wordclouds'):
+                if name != filename and stale.fullmatch(name):
+                    os.remove(os.path.join('static/wordclouds', name))
+        
+        return f'/static/wordclouds/{quote(filename)}'
+    
+    def _render_wordcloud(self, keyword: str, frequencies: Counter, image_path: str) -> str:
+        """根据累加的词频生成词云图"""
         # 尝试使用不同的字体路径
         font_paths = [
             '/usr/share/fonts/truetype/simhei/SimHei.ttf',
@@ -156,51 +357,160 @@ class DataAnalyzer:
         if font_path:
             wordcloud_config['font_path'] = font_path
         
-        wordcloud = WordCloud(**wordcloud_config).generate(words_text)
+        wordcloud = WordCloud(**wordcloud_config).generate_from_frequencies(frequencies)
         
-        # 保存图片
-        os.makedirs('static/wordclouds', exist_ok=True)
-        image_path = f'static/wordclouds/{keyword}_wordcloud.png'
+        # 保存图片（pyplot不是线程安全的）
+        os.makedirs(os.path.dirname(image_path), exist_ok=True)
         
-        plt.figure(figsize=(12, 6))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.title(f'{keyword} 岗位词云分析', fontsize=16, pad=20)
-        plt.tight_layout()
-        plt.savefig(image_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        with self._plot_lock:
+            plt.figure(figsize=(12, 6))
+            plt.imshow(wordcloud, interpolation='bilinear')
+            plt.axis('off')
+            plt.title(f'{keyword} 岗位词云分析', fontsize=16, pad=20)
+            plt.tight_layout()
+            plt.savefig(image_path, dpi=300, bbox_inches='tight')
+            plt.close()
         
         return image_path
     
-    def _analyze_salary(self, jobs: List[Dict]) -> Dict:
-        """分析薪资分布"""
-        salaries = []
-        for job in jobs:
-            salary = job.get('salary', '')
-            if salary and salary != '面议':
-                # 提取薪资数字
-                numbers = re.findall(r'\d+', salary)
-                if numbers:
-                    try:
-                        if 'K' in salary.upper() or 'k' in salary:
-                            # 处理如 15K-30K 的格式
-                            if len(numbers) >= 2:
-                                min_sal = int(numbers[0])
-                                max_sal = int(numbers[1])
-                                salaries.append((min_sal + max_sal) / 2)
-                            elif len(numbers) == 1:
-                                salaries.append(int(numbers[0]))
-                        elif '万' in salary:
-                            # 处理万元格式
-                            if len(numbers) >= 2:
-                                min_sal = int(numbers[0]) * 10
-                                max_sal = int(numbers[1]) * 10
-                                salaries.append((min_sal + max_sal) / 2)
-                            elif len(numbers) == 1:
-                                salaries.append(int(numbers[0]) * 10)
-                    except:
-                        pass
+    async def get_dashboard(self, keyword: str, include_archive: bool = False,
+                            dedupe: Optional[str] = None, job_limit: int = 100) -> Dict:
+        """仪表盘数据：岗位只扫描一次，各部分基于同一份汇总并发计算"""
+        # 分词（关键词提取和词云词频）在这一次扫描中串行完成，受GIL限制拆成并发任务也不会更快；
+        # 并发的只有之后的统计整理、分析整理和词云渲染
+        summary = await asyncio.to_thread(
+            self._summarize, keyword, include_archive, dedupe, True, True, job_limit
+        )
+        
+        statistics, analysis, wordcloud_url = await asyncio.gather(
+            asyncio.to_thread(self._statistics_from_summary, summary),
+            asyncio.to_thread(self._analysis_from_summary, keyword, summary),
+            asyncio.to_thread(self.get_cached_wordcloud, keyword, summary, include_archive, dedupe),
+            return_exceptions=True
+        )
+        
+        if isinstance(wordcloud_url, Exception):
+            # 词云失败（如缺少字体）不影响其他部分
+            print(f"生成词云出错: {str(wordcloud_url)}")
+            wordcloud_url = None
+        for section in (statistics, analysis):
+            if isinstance(section, Exception):
+                raise section
+        
+        job_list = await asyncio.to_thread(self._job_list, summary.jobs)
+        
+        return {
+            "keyword": keyword,
+            "statistics": statistics,
+            "analysis": analysis,
+            "wordcloud_url": wordcloud_url,
+            "jobs": {"jobs": job_list, "count": len(job_list)}
+        }
+    
+    def _job_list(self, jobs: List[Dict]) -> List[Dict]:
+        """为列表展示的岗位补全维度名称，热数据只查询这几条，归档数据本身已带名称"""
+        hot_ids = [job['id'] for job in jobs if 'company' not in job]
+        named = {job['id']: job for job in self.db.get_jobs_by_ids(hot_ids)}
+        return [job if 'company' in job else named.get(job['id'], job) for job in jobs]
+    
+    def compare_keywords(self, keywords: List[str]) -> Dict:
+        """多关键词对比：一次查询取出所有匹配岗位，按整数维度列分组计算各项统计"""
+        keyword_ids = self.db.match_keyword_ids(keywords)
+        all_ids = sorted({i for ids in keyword_ids.values() for i in ids})
+        
+        columns = ['keyword_id', 'company_id', 'salary', 'area_id', 'experience_id', 'education_id']
+        df = pd.DataFrame.from_records(self.db.get_jobs_by_keyword_ids(all_ids, columns), columns=columns)
+        
+        # 每个岗位只解析一次薪资
+        df['salary_value'] = self._salary_values(df['salary'])
+        
+        # 按关键词打标签，同一岗位可能匹配多个关键词
+        grouped = pd.concat([
+            df[df['keyword_id'].isin(keyword_ids[keyword])].assign(group=keyword)
+            for keyword in keywords
+        ]) if not df.empty else df.assign(group=pd.Series(dtype=object))
+        
+        totals = grouped.groupby('group').size()
+        company_counts = grouped.groupby('group')['company_id'].nunique()
+        area_counts = grouped.groupby(['group', 'area_id']).size()
+        exp_counts = grouped.groupby(['group', 'experience_id'], dropna=False).size()
+        edu_counts = grouped.groupby(['group', 'education_id'], dropna=False).size()
+        salaries = grouped.dropna(subset=['salary_value']).groupby('group')['salary_value']
+        
+        comparison = []
+        for keyword in keywords:
+            total = int(totals.get(keyword, 0))
+            if not total:
+                comparison.append({"keyword": keyword, "total_jobs": 0})
+                continue
+            
+            comparison.append({
+                "keyword": keyword,
+                "total_jobs": total,
+                "company_count": int(company_counts.get(keyword, 0)),
+                "salary_statistics": self._salary_stats_from_series(
+                    salaries.get_group(keyword) if keyword in salaries.groups else pd.Series(dtype=float)
+                ),
+                "area_distribution": self._top_counts(area_counts, keyword, 'area', 10),
+                "experience_distribution": self._top_counts(exp_counts, keyword, 'experience'),
+                "education_distribution": self._top_counts(edu_counts, keyword, 'education')
+            })
+        
+        return {
+            "keywords": keywords,
+            "comparison": comparison
+        }
+    
+    def _salary_values(self, salaries: pd.Series) -> pd.Series:
+        """向量化解析薪资（单位K），规则与 _parse_salary 一致，无法解析的为NaN"""
+        salaries = salaries.fillna('')
+        numbers = salaries.str.extract(r'(\d+)(?:\D+(\d+))?').astype(float)
+        values = numbers[0].where(numbers[1].isna(), (numbers[0] + numbers[1]) / 2)
+        
+        is_k = salaries.str.upper().str.contains('K', regex=False)
+        is_wan = ~is_k & salaries.str.contains('万', regex=False)
+        values = values.where(is_k, values * 10)
+        return values.where((is_k | is_wan) & (salaries != '面议'))
+    
+    def _salary_stats_from_series(self, salaries: pd.Series) -> Dict:
+        """根据已解析的薪资序列计算统计，输出格式与 _analyze_salary 一致"""
+        if salaries.empty:
+            return {"avg": 0, "min": 0, "max": 0, "distribution": []}
+        
+        bins = [0, 10, 15, 20, 25, 30, 40, 50, float('inf')]
+        labels = ["0-10K", "10-15K", "15-20K", "20-25K", "25-30K", "30-40K", "40-50K", "50K+"]
+        counts = pd.cut(salaries, bins=bins, labels=labels, right=False).value_counts(sort=False)
+        
+        return {
+            "avg": round(float(salaries.mean()), 2),
+            "min": int(salaries.min()),
+            "max": int(salaries.max()),
+            "median": int(salaries.median()),
+            "distribution": [
+                {"range": label, "count": int(count), "percentage": round(count/len(salaries)*100, 2)}
+                for label, count in counts.items() if count > 0
+            ]
+        }
+    
+    def _top_counts(self, counts: pd.Series, keyword: str, name: str, top_n: Optional[int] = None) -> List[Dict]:
+        """从 (关键词, 维度ID) 分组计数中取出某个关键词的分布，只为前N个ID取回名称"""
+        if keyword not in counts.index.get_level_values(0):
+            return []
+        
+        items = counts.loc[keyword].sort_values(ascending=False, kind='stable')
+        if top_n:
+            items = items.head(top_n)
         
+        value_ids = [None if pd.isna(value_id) else int(value_id) for value_id in items.index]
+        names = self.db.get_dimension_names(name, [i for i in value_ids if i is not None])
+        
+        return [
+            {name: names.get(value_id, ''), "count": int(count)}
+            for value_id, count in zip(value_ids, items.values)
+        ]
+    
+    def _analyze_salary(self, salaries: List[float]) -> Dict:
+        """分析薪资分布"""
         if not salaries:
             return {"avg": 0, "min": 0, "max": 0, "distribution": []}
         
@@ -212,6 +522,29 @@ class DataAnalyzer:
             "distribution": self._salary_range_distribution(salaries)
         }
     
+    def _parse_salary(self, salary: str) -> Optional[float]:
+        """解析单条薪资（单位K），无法解析时返回None"""
+        if not salary or salary == '面议':
+            return None
+        
+        # 提取薪资数字
+        numbers = re.findall(r'\d+', salary)
+        if not numbers:
+            return None
+        
+        if 'K' in salary.upper():
+            # 处理如 15K-30K 的格式
+            unit = 1
+        elif '万' in salary:
+            # 处理万元格式
+            unit = 10
+        else:
+            return None
+        
+        if len(numbers) >= 2:
+            return (int(numbers[0]) * unit + int(numbers[1]) * unit) / 2
+        return int(numbers[0]) * unit
+    
     def _salary_range_distribution(self, salaries: List[float]) -> List[Dict]:
         """薪资区间分布"""
         ranges = [
@@ -233,80 +566,84 @@ class DataAnalyzer:
         
         return distribution
     
-    def _analyze_area(self, jobs: List[Dict]) -> List[Dict]:
+    def _analyze_area(self, area_counter: Counter) -> List[Dict]:
         """分析地区分布"""
-        areas = [job.get('area', '') for job in jobs if job.get('area')]
-        area_counter = Counter(areas)
-        
-        return [
-            {"area": area, "count": count}
-            for area, count in area_counter.most_common(10)
-        ]
+        return self._top_dimension(area_counter, 'area', 10)
+    
+    def _analyze_city(self, area_counter: Counter) -> List[Dict]:
+        """分析城市分布（"北京·朝阳区" 和 "北京" 都计入北京），由地区计数按城市汇总"""
+        city_ids = self.db.get_area_city_ids([key for key in area_counter if isinstance(key, int)])
+        # 没有地区ID的文本地区，按城市名称查找城市ID，避免与热数据的同一城市分开计数
+        text_cities = {key: canonicalize_area(key)[0] for key in area_counter if not isinstance(key, int)}
+        city_name_ids = self.db.find_dimension_ids('city', list(text_cities.values()))
+        city_counter = Counter()
+        for key, count in area_counter.items():
+            if isinstance(key, int):
+                city_counter[city_ids.get(key)] += count
+            else:
+                city_counter[city_name_ids.get(text_cities[key], text_cities[key])] += count
+        return self._top_dimension(city_counter, 'city', 10)
     
-    def _analyze_experience(self, jobs: List[Dict]) -> List[Dict]:
+    def _analyze_experience(self, exp_counter: Counter) -> List[Dict]:
         """分析经验要求分布"""
-        experiences = [job.get('experience', '不限') for job in jobs]
-        exp_counter = Counter(experiences)
-        
-        return [
-            {"experience": exp, "count": count}
-            for exp, count in exp_counter.most_common()
-        ]
+        return self._top_dimension(exp_counter, 'experience')
     
-    def _analyze_education(self, jobs: List[Dict]) -> List[Dict]:
+    def _analyze_education(self, edu_counter: Counter) -> List[Dict]:
         """分析学历要求分布"""
-        educations = [job.get('education', '不限') for job in jobs]
-        edu_counter = Counter(educations)
+        return self._top_dimension(edu_counter, 'education')
+    
+    def _dimension_key(self, job: Dict, dimension: str):
+        """维度的计数键：优先使用整数ID，没有ID时使用文本（迁移前归档的数据），都没有时为空字符串"""
+        value_id = job.get(f'{dimension}_id')
+        if value_id is not None:
+            return value_id
+        return job.get(dimension) or ''
+    
+    def _top_dimension(self, counter: Counter, dimension: str, top_n: Optional[int] = None) -> List[Dict]:
+        """取出计数最多的前N项，只为这些ID取回名称"""
+        top = counter.most_common(top_n)
+        names = self.db.get_dimension_names(dimension, [key for key, _ in top if isinstance(key, int)])
         
         return [
-            {"education": edu, "count": count}
-            for edu, count in edu_counter.most_common()
+            {dimension: names.get(key, '') if isinstance(key, int) else key, "count": count}
+            for key, count in top
         ]
     
-    def _extract_keywords(self, text: str, top_k: int = 20) -> List[Dict]:
-        """提取关键词"""
-        keywords = jieba.analyse.extract_tags(text, topK=top_k, withWeight=True)
+    def _extract_keywords(self, word_freq: Counter, top_k: int = 20) -> List[Dict]:
+        """提取关键词（TF-IDF，计算方式与 jieba.analyse.extract_tags 一致，词频按批次累加）"""
+        tfidf = jieba.analyse.default_tfidf
+        total = sum(word_freq.values())
+        weights = {
+            word: count * tfidf.idf_freq.get(word, tfidf.median_idf) / total
+            for word, count in word_freq.items()
+        }
+        keywords = sorted(weights.items(), key=lambda x: x[1], reverse=True)[:top_k]
         
         return [
             {"word": word, "weight": round(weight, 4)}
             for word, weight in keywords
         ]
     
-    def _analyze_skills(self, text: str) -> List[Dict]:
+    def _analyze_skills(self, skill_counts: Counter, text_length: int) -> List[Dict]:
         """分析技能需求"""
-        # 常见技能关键词
-        skill_keywords = [
-            'Python', 'Java', 'JavaScript', 'TypeScript', 'Go', 'C++', 'C#',
-            'React', 'Vue', 'Angular', 'Node.js', 'Spring', 'Django', 'Flask',
-            'MySQL', 'PostgreSQL', 'MongoDB', 'Redis', 'Elasticsearch',
-            'Docker', 'Kubernetes', 'AWS', 'Azure', 'Linux',
-            'TensorFlow', 'PyTorch', '机器学习', '深度学习', '数据分析'
-        ]
-        
-        skill_count = {}
-        text_lower = text.lower()
-        
-        for skill in skill_keywords:
-            count = text_lower.count(skill.lower())
-            if count > 0:
-                skill_count[skill] = count
+        skill_count = {skill: skill_counts[skill] for skill in SKILL_KEYWORDS if skill_counts[skill] > 0}
         
         sorted_skills = sorted(skill_count.items(), key=lambda x: x[1], reverse=True)
         
         return [
-            {"skill": skill, "count": count, "demand_rate": round(count/len(text)*100, 2)}
+            {"skill": skill, "count": count, "demand_rate": round(count/text_length*100, 2)}
             for skill, count in sorted_skills[:15]
         ]
     
-    def _analyze_salary_range(self, jobs: List[Dict]) -> Dict:
+    def _analyze_salary_range(self, salaries: List[float]) -> Dict:
         """分析薪资范围"""
-        return self._analyze_salary(jobs)
+        return self._analyze_salary(salaries)
     
-    def _analyze_trends(self, jobs: List[Dict]) -> Dict:
+    def _analyze_trends(self, summary: JobSummary) -> Dict:
         """分析趋势（基于爬取时间）"""
         # 简单的趋势分析，可以基于时间分布
         return {
-            "latest_crawl": jobs[0].get('crawl_time', '') if jobs else '',
+            "latest_crawl": summary.latest_crawl,
             "job_count_by_date": "需要时间序列数据"
         }
 
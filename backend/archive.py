@@ -0,0 +1,176 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from database import Database
+from dimensions import normalize_area
+
+class ArchiveManager:
+    """冷数据归档类：将超过保留期的岗位移入按日期分区的Parquet文件"""
+    
+    def __init__(self, db: Database, archive_dir: str = "archive",
+                 default_retention_days: int = 90, batch_size: int = 5000):
+        self.db = db
+        self.archive_dir = archive_dir
+        self.default_retention_days = default_retention_days
+        self.batch_size = batch_size
+        os.makedirs(self.archive_dir, exist_ok=True)
+    
+    def run(self) -> Dict:
+        """按保留策略归档过期岗位，并回收数据库空间"""
+        policies = self.db.get_retention_policies()
+        archived = 0
+        partitions = set()
+        
+        # 单独配置了保留天数的关键词
+        for keyword, days in policies.items():
+            count, parts = self._archive_where(
+                'keyword = ? AND crawl_time < ?',
+                [keyword, self._cutoff(days)]
+            )
+            archived += count
+            partitions.update(parts)
+        
+        # 其余关键词使用默认保留天数
+        condition = 'crawl_time < ?'
+        params = [self._cutoff(self.default_retention_days)]
+        if policies:
+            placeholders = ', '.join('?' for _ in policies)
+            condition += f' AND keyword NOT IN ({placeholders})'
+            params.extend(policies.keys())
+        count, parts = self._archive_where(condition, params)
+        archived += count
+        partitions.update(parts)
+        
+        if archived:
+            self.db.incremental_vacuum()
+        
+        return {
+            "archived_count": archived,
+            "partitions": sorted(partitions)
+        }
+    
+    def iter_batches(self, keyword: Optional[str] = None) -> Iterator[List[Dict]]:
+        """按批次流式读取归档岗位，最新的分区优先，每次只有一个批次在内存中"""
+        for path in self._partition_files():
+            parquet_file = pq.ParquetFile(path)
+            for batch in parquet_file.iter_batches(batch_size=self.batch_size):
+                df = batch.to_pandas()
+                if keyword:
+                    # 与数据库中 LIKE '%keyword%' 的匹配方式保持一致
+                    mask = df['keyword'].fillna('').str.contains(keyword, case=False, regex=False)
+                    df = df[mask]
+                if df.empty:
+                    continue
+                if 'company_id' not in df.columns:
+                    df = self._resolve_dimension_ids(df)
+                # 含空值的ID列在Parquet中保存为浮点数，还原成整数
+                for column in df.columns:
+                    if column == 'id' or column.endswith('_id'):
+                        df[column] = df[column].astype('Int64')
+                df = df.astype(object).where(df.notna(), None)
+                yield df.to_dict('records')
+    
+    def _resolve_dimension_ids(self, df: pd.DataFrame) -> pd.DataFrame:
+        """迁移前写入的分区只有文本列，按名称查出已有的维度ID，与热数据按同一ID计数"""
+        df = df.copy()
+        for dimension in ('company', 'experience', 'education', 'keyword'):
+            names = df[dimension].fillna('')
+            df[f'{dimension}_id'] = names.map(self.db.find_dimension_ids(dimension, names.unique().tolist()))
+        
+        areas = df['area'].fillna('').map(normalize_area)
+        df['area_id'] = areas.map(self.db.find_dimension_ids('area', areas.unique().tolist()))
+        area_ids = [int(i) for i in df['area_id'].dropna().unique()]
+        df['city_id'] = df['area_id'].map(self.db.get_area_city_ids(area_ids))
+        return df
+    
+    def _archive_where(self, condition: str, params: List) -> Tuple[int, List[str]]:
+        """分批归档满足条件的岗位，每批写入成功后再从热库删除"""
+        conn = sqlite3.connect(self.db.db_path)
+        archived = 0
+        partitions = set()
+        written = []  # 当前批次已写入、但热库删除尚未提交的分区文件
+        
+        try:
+            while True:
+                df = pd.read_sql_query(
+                    f'SELECT * FROM v_jobs WHERE {condition} ORDER BY id LIMIT ?',
+                    conn,
+                    params=params + [self.batch_size]
+                )
+                if df.empty:
+                    break
+                
+                batch_partitions = self._write_partitions(df, written)
+                
+                ids = df['id'].tolist()
+                placeholders = ', '.join('?' for _ in ids)
+                conn.execute(f'DELETE FROM jobs WHERE id IN ({placeholders})', ids)
+                conn.execute(f'DELETE FROM job_minhash WHERE job_id IN ({placeholders})', ids)
+                conn.execute(f'DELETE FROM lsh_buckets WHERE job_id IN ({placeholders})', ids)
+                conn.commit()
+                written.clear()
+                partitions.update(batch_partitions)
+                archived += len(ids)
+        except Exception as e:
+            print(f"归档岗位数据出错: {str(e)}")
+            conn.rollback()
+            # 岗位仍留在热库中，删除本批次已写入的分区文件，避免数据同时出现在热库和归档中
+            for path in written:
+                try:
+                    os.remove(path)
+                except OSError as remove_error:
+                    print(f"删除归档文件 {path} 失败: {str(remove_error)}")
+        finally:
+            conn.close()
+        
+        return archived, sorted(partitions)
+    
+    def _write_partitions(self, df: pd.DataFrame, written: List[str]) -> List[str]:
+        """按爬取日期拆分写入压缩的Parquet分区，写入的文件路径追加到 written"""
+        partitions = []
+        dates = df['crawl_time'].fillna('').str[:10].replace('', 'unknown')
+        
+        for date, group in df.groupby(dates):
+            partition = f'date={date}'
+            partition_dir = os.path.join(self.archive_dir, partition)
+            os.makedirs(partition_dir, exist_ok=True)
+            
+            # 文件名取本组的首尾岗位ID（自增ID不会复用），进程中断后重试同一批次会覆盖而不是重复写入；
+            # 先写临时文件再重命名，避免读取到写了一半的文件
+            path = os.path.join(partition_dir, f"part-{group['id'].min()}-{group['id'].max()}.parquet")
+            tmp_path = path + '.tmp'
+            group.to_parquet(tmp_path, compression='zstd', index=False)
+            os.replace(tmp_path, path)
+            written.append(path)
+            partitions.append(partition)
+        
+        return partitions
+    
+    def _partition_files(self) -> List[str]:
+        """列出所有分区文件，按日期倒序"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        
+        files = []
+        for partition in sorted(os.listdir(self.archive_dir), reverse=True):
+            partition_dir = os.path.join(self.archive_dir, partition)
+            if not partition.startswith('date=') or not os.path.isdir(partition_dir):
+                continue
+            for name in sorted(os.listdir(partition_dir)):
+                if name.endswith('.parquet'):
+                    files.append(os.path.join(partition_dir, name))
+        return files
+    
+    def retention_cutoff(self, keyword: str) -> str:
+        """关键词热数据的保留截止时间，早于该时间的岗位应当在归档中"""
+        days = self.db.get_retention_policies().get(keyword, self.default_retention_days)
+        return self._cutoff(days)
+    
+    def _cutoff(self, days: int) -> str:
+        """计算保留期的截止时间"""
+        return (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
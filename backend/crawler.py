@@ -1,18 +1,23 @@
 import requests
-from bs4 import BeautifulSoup
+import asyncio
+import os
 import time
 import random
-from typing import List, Dict
-import json
-import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import quote
+from datetime import datetime
+from job_parser import parse_page
+from raw_store import RawPageStore, parse_stored_page
 
 class BossCrawler:
     """Boss直聘爬虫"""
     
-    def __init__(self):
+    def __init__(self, fetch_concurrency: int = 1, parse_workers: Optional[int] = None,
+                 raw_store: Optional[RawPageStore] = None):
         self.base_url = "https://www.zhipin.com"
         self.search_url = "https://www.zhipin.com/web/geek/job"
+        self.city = "100010000"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "application/json, text/plain, */*",
@@ -21,52 +26,42 @@ class BossCrawler:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        # 抓取并发数和解析进程数分开配置
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self._parse_pool = None
+        # 抓取到的原始页面，页面结构变化后可以离线重新解析
+        self.raw_store = raw_store
+    
+    @property
+    def parse_pool(self) -> ProcessPoolExecutor:
+        """解析进程池，首次使用时创建，多次爬取之间共享"""
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        return self._parse_pool
+    
+    def close(self):
+        """关闭解析进程池"""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
     
     async def crawl(self, keyword: str, max_pages: int = 5) -> List[Dict]:
         """爬取岗位数据"""
         jobs = []
         
         try:
-            # Boss直聘的搜索接口（需要根据实际API调整）
+            page_results = await self._crawl_pages(keyword, max_pages)
+            
             for page in range(1, max_pages + 1):
-                # 尝试访问搜索页面
-                search_url = f"{self.base_url}/web/geek/job?query={quote(keyword)}&city=100010000&page={page}"
-                
-                try:
-                    response = self.session.get(
-                        search_url,
-                        timeout=10
-                    )
-                    
-                    # 如果返回HTML，需要解析
-                    if response.status_code == 200:
-                        page_jobs = self._parse_jobs_from_html(response.text, keyword)
-                        if not page_jobs:
-                            # 如果没有解析到数据，可能是页面结构变化，尝试生成测试数据
-                            if page == 1:
-                                print(f"警告: 无法解析页面数据，生成测试数据用于演示")
-                                jobs.extend(self._generate_mock_data(keyword, max_pages))
-                            break
-                        else:
-                            jobs.extend(page_jobs)
-                        
-                        # 随机延迟，避免被封
-                        time.sleep(random.uniform(2, 5))
-                    else:
-                        print(f"请求失败，状态码: {response.status_code}")
-                        # 如果第一页就失败，生成测试数据
-                        if page == 1:
-                            print(f"生成测试数据用于演示")
-                            jobs.extend(self._generate_mock_data(keyword, max_pages))
-                        break
-                        
-                except Exception as e:
-                    print(f"爬取第 {page} 页时出错: {str(e)}")
-                    # 如果第一页就出错，生成测试数据
-                    if page == 1 and not jobs:
-                        print(f"生成测试数据用于演示")
+                page_jobs = page_results.get(page)
+                if not page_jobs:
+                    # 请求失败或没有解析到数据，可能是页面结构变化，第一页就失败时生成测试数据
+                    if page == 1:
+                        print(f"警告: 无法获取页面数据，生成测试数据用于演示")
                         jobs.extend(self._generate_mock_data(keyword, max_pages))
                     break
+                jobs.extend(page_jobs)
             
             # 如果没有爬取到任何数据，生成测试数据
             if not jobs:
@@ -81,104 +76,115 @@ class BossCrawler:
                 jobs = self._generate_mock_data(keyword, max_pages)
             return jobs
     
-    def _parse_jobs_from_html(self, html: str, keyword: str = "") -> List[Dict]:
-        """从HTML中解析岗位信息"""
-        jobs = []
-        soup = BeautifulSoup(html, 'html.parser')
+    async def _crawl_pages(self, keyword: str, max_pages: int) -> Dict[int, List[Dict]]:
+        """抓取与解析流水线：抓取协程把页面放入队列，解析协程交给进程池处理"""
+        loop = asyncio.get_running_loop()
+        pool = self.parse_pool
+        queue = asyncio.Queue(maxsize=self.fetch_concurrency * 2)
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+        results = {}
+        # 出现空页或失败页后，不再抓取更靠后的页面
+        stop_page = [max_pages + 1]
+        
+        async def fetch(page: int):
+            async with semaphore:
+                if page >= stop_page[0]:
+                    return
+                fetch_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                html = await asyncio.to_thread(self._fetch_page, keyword, page, fetch_time)
+                if html is None:
+                    stop_page[0] = min(stop_page[0], page)
+                    return
+                await queue.put((page, html, fetch_time))
+                # 随机延迟，避免被封
+                await asyncio.sleep(random.uniform(2, 5))
+        
+        async def parse():
+            while True:
+                page, html, fetch_time = await queue.get()
+                try:
+                    page_jobs = await loop.run_in_executor(pool, parse_page, html, keyword)
+                except Exception as e:
+                    print(f"解析第 {page} 页时出错: {str(e)}")
+                    page_jobs = []
+                finally:
+                    queue.task_done()
+                # 岗位的爬取时间与原始页面的抓取时间一致，重放时据此替换对应岗位
+                for job in page_jobs:
+                    job['crawl_time'] = fetch_time
+                results[page] = page_jobs
+                if not page_jobs:
+                    stop_page[0] = min(stop_page[0], page)
+        
+        parsers = [asyncio.create_task(parse()) for _ in range(self.parse_workers)]
+        try:
+            await asyncio.gather(*(fetch(page) for page in range(1, max_pages + 1)))
+            await queue.join()
+        finally:
+            for task in parsers:
+                task.cancel()
+        
+        return results
+    
+    async def replay(self, keyword: Optional[str] = None) -> Tuple[Dict[str, List[Dict]], List[Dict]]:
+        """离线重放：用当前解析器并行解析已保存的页面，不访问网络，返回 (按关键词分组的岗位, 失败的页面)"""
+        if not self.raw_store:
+            raise ValueError("未配置原始页面存储")
+        
+        loop = asyncio.get_running_loop()
+        pool = self.parse_pool
+        records = self.raw_store.list_pages(keyword)
         
-        # Boss直聘的页面结构（需要根据实际页面调整选择器）
-        job_items = (soup.find_all('div', class_='job-primary') or 
-                    soup.find_all('li', class_='job-card-wrapper') or
-                    soup.find_all('div', class_='job-card') or
-                    soup.find_all('li', class_='job-item'))
+        page_results = await asyncio.gather(*(
+            loop.run_in_executor(pool, parse_stored_page, self.raw_store.store_dir, record)
+            for record in records
+        ), return_exceptions=True)
         
-        if not job_items:
-            # 尝试查找JSON数据
-            script_tags = soup.find_all('script')
-            for script in script_tags:
-                if script.string:
-                    # 尝试提取JSON数据
-                    json_patterns = [
-                        r'window\.__INITIAL_STATE__\s*=\s*({.+?});',
-                        r'jobList\s*[:=]\s*(\[.+?\])',
-                        r'geekList\s*[:=]\s*(\[.+?\])'
-                    ]
-                    for pattern in json_patterns:
-                        json_match = re.search(pattern, script.string, re.DOTALL)
-                        if json_match:
-                            try:
-                                data = json.loads(json_match.group(1))
-                                parsed_jobs = self._parse_from_json(data, keyword)
-                                if parsed_jobs:
-                                    return parsed_jobs
-                            except:
-                                pass
+        # 并发抓取时同一秒的多个页面共用一个爬取时间，按 (关键词, 抓取时间) 分组
+        groups = {}
+        for record, page_jobs in zip(records, page_results):
+            groups.setdefault((record['keyword'], record['fetch_time']), []).append((record, page_jobs))
         
-        # 解析HTML中的岗位信息
-        for item in job_items[:30]:  # 限制每页最多30条
-            try:
-                job = self._extract_job_info(item, keyword)
-                if job:
-                    jobs.append(job)
-            except Exception as e:
-                print(f"解析岗位信息出错: {str(e)}")
+        jobs_by_keyword = {}
+        failed_pages = []
+        for (page_keyword, fetch_time), pages in groups.items():
+            failed = [
+                {
+                    "keyword": page_keyword,
+                    "page": record['page'],
+                    "fetch_time": fetch_time,
+                    "error": str(page_jobs) if isinstance(page_jobs, Exception) else "未解析到岗位"
+                }
+                for record, page_jobs in pages
+                if isinstance(page_jobs, Exception) or not page_jobs
+            ]
+            if failed:
+                # 同一抓取时间有页面解析失败时，整组岗位都不替换，避免失败页面对应的岗位被删除
+                for page in failed:
+                    print(f"重放第 {page['page']} 页（{page_keyword}，{fetch_time}）时出错: {page['error']}")
+                failed_pages.extend(failed)
                 continue
+            jobs_by_keyword.setdefault(page_keyword, []).extend(
+                job for _, page_jobs in pages for job in page_jobs
+            )
         
-        return jobs
+        return jobs_by_keyword, failed_pages
     
-    def _extract_job_info(self, item, keyword: str = "") -> Dict:
-        """提取单个岗位信息"""
-        job = {}
+    def _fetch_page(self, keyword: str, page: int, fetch_time: str) -> Optional[str]:
+        """抓取单个搜索页面，失败时返回None"""
+        search_url = f"{self.base_url}/web/geek/job?query={quote(keyword)}&city={self.city}&page={page}"
         
         try:
-            # 岗位名称 - 尝试多种选择器
-            title_elem = (item.find('a', class_='job-title') or 
-                         item.find('span', class_='job-name') or
-                         item.find('div', class_='job-name') or
-                         item.find('h3'))
-            job['title'] = title_elem.get_text(strip=True) if title_elem else f"{keyword}相关岗位"
-            
-            # 公司名称
-            company_elem = (item.find('a', class_='company-name') or 
-                          item.find('div', class_='company-text') or
-                          item.find('div', class_='company-name'))
-            job['company'] = company_elem.get_text(strip=True) if company_elem else "未知公司"
-            
-            # 薪资
-            salary_elem = (item.find('span', class_='salary') or 
-                          item.find('span', class_='red') or
-                          item.find('div', class_='salary'))
-            job['salary'] = salary_elem.get_text(strip=True) if salary_elem else "面议"
-            
-            # 工作地点
-            area_elem = (item.find('span', class_='job-area') or 
-                        item.find('span', class_='area') or
-                        item.find('div', class_='job-area'))
-            job['area'] = area_elem.get_text(strip=True) if area_elem else "未知地区"
-            
-            # 经验要求
-            exp_elem = item.find('span', class_='job-limit') or item.find('span', class_='exp')
-            job['experience'] = exp_elem.get_text(strip=True) if exp_elem else "不限"
-            
-            # 学历要求
-            edu_elem = item.find('span', class_='job-limit') or item.find('span', class_='edu')
-            job['education'] = edu_elem.get_text(strip=True) if edu_elem else "不限"
-            
-            # 岗位描述/标签
-            desc_elem = (item.find('div', class_='job-info') or 
-                        item.find('div', class_='info-desc') or
-                        item.find('p', class_='job-desc'))
-            job['description'] = desc_elem.get_text(strip=True) if desc_elem else ""
-            
-            # 添加关键词和爬取时间
-            job['keyword'] = keyword
-            job['crawl_time'] = time.strftime("%Y-%m-%d %H:%M:%S")
-            
+            response = self.session.get(search_url, timeout=10)
+            if response.status_code != 200:
+                print(f"请求失败，状态码: {response.status_code}")
+                return None
+            if self.raw_store:
+                self.raw_store.save(response.text, keyword, self.city, page, fetch_time)
+            return response.text
         except Exception as e:
-            print(f"提取岗位信息出错: {str(e)}")
+            print(f"爬取第 {page} 页时出错: {str(e)}")
             return None
-        
-        return job
     
     def _generate_mock_data(self, keyword: str, max_pages: int = 5) -> List[Dict]:
         """生成模拟数据用于测试和演示"""
@@ -218,35 +224,3 @@ class BossCrawler:
             mock_jobs.append(job)
         
         return mock_jobs
-    
-    def _parse_from_json(self, data: Dict, keyword: str = "") -> List[Dict]:
-        """从JSON数据中解析岗位（如果API返回JSON）"""
-        jobs = []
-        # 根据实际JSON结构实现
-        # Boss直聘的JSON结构可能包含在 jobList 或 geekList 中
-        try:
-            if isinstance(data, dict):
-                # 尝试找到岗位列表
-                job_list = (data.get('jobList', []) or 
-                           data.get('geekList', []) or 
-                           data.get('data', {}).get('jobList', []))
-                
-                for item in job_list:
-                    if isinstance(item, dict):
-                        job = {
-                            'title': item.get('jobName') or item.get('title') or f"{keyword}相关岗位",
-                            'company': item.get('brandName') or item.get('company') or '未知公司',
-                            'salary': item.get('salaryDesc') or item.get('salary') or '面议',
-                            'area': item.get('cityName') or item.get('area') or '未知地区',
-                            'experience': item.get('experienceName') or item.get('experience') or '不限',
-                            'education': item.get('degreeName') or item.get('education') or '不限',
-                            'description': item.get('jobDesc') or item.get('description') or '',
-                            'keyword': keyword,
-                            'crawl_time': time.strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                        jobs.append(job)
-        except Exception as e:
-            print(f"解析JSON数据出错: {str(e)}")
-        
-        return jobs
-
@@ -2,12 +2,14 @@ import sqlite3
 import json
 from typing import List, Dict, Optional
 from datetime import datetime
+from dimensions import DimensionCache
 
 class Database:
     """数据库操作类"""
     
     def __init__(self, db_path: str = "boss_jobs.db"):
         self.db_path = db_path
+        self.dimensions = DimensionCache()
         self.init_database()
     
     def init_database(self):
@@ -15,30 +17,204 @@ class Database:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # 创建岗位表
+        # 启用增量回收，归档删除旧数据后可以释放磁盘空间
+        # 已存在的数据库需要执行一次VACUUM才能切换模式
+        cursor.execute('PRAGMA auto_vacuum')
+        if cursor.fetchone()[0] != 2:
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('VACUUM')
+        
+        # 创建维度表（公司、经验、学历、关键词、城市、地区），岗位表只保存整数ID
+        for table in ('dim_company', 'dim_experience', 'dim_education', 'dim_keyword', 'dim_city'):
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE
+                )
+            ''')
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS jobs (
+            CREATE TABLE IF NOT EXISTS dim_area (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                company TEXT,
-                salary TEXT,
-                area TEXT,
-                experience TEXT,
-                education TEXT,
-                description TEXT,
-                keyword TEXT,
-                crawl_time TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                name TEXT NOT NULL UNIQUE,
+                city_id INTEGER,
+                district TEXT
             )
         ''')
         
+        # 旧版岗位表直接保存文本，迁移到维度ID；上次迁移中断留下 jobs_legacy 时继续从中迁移
+        cursor.execute('PRAGMA table_info(jobs)')
+        columns = [row[1] for row in cursor.fetchall()]
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_legacy'")
+        resume = cursor.fetchone() is not None
+        migrate = resume or 'company' in columns
+        
+        if migrate:
+            self._migrate_legacy_jobs(conn, resume)
+        else:
+            self._create_jobs_table(conn)
+        
         # 创建索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_keyword ON jobs(keyword)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_keyword ON jobs(keyword_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_title ON jobs(title)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_crawl_time ON jobs(crawl_time)')
         
+        # 查询用视图，把维度ID还原成文本，列名与旧版岗位表一致
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS v_jobs AS
+            SELECT j.id, j.title,
+                   COALESCE(c.name, '') AS company,
+                   j.salary,
+                   COALESCE(a.name, '') AS area,
+                   COALESCE(ex.name, '') AS experience,
+                   COALESCE(ed.name, '') AS education,
+                   j.description,
+                   COALESCE(k.name, '') AS keyword,
+                   j.crawl_time, j.created_at, j.cluster_id,
+                   COALESCE(ci.name, '') AS city,
+                   COALESCE(a.district, '') AS district,
+                   j.company_id, j.area_id, a.city_id, j.experience_id, j.education_id, j.keyword_id
+            FROM jobs j
+            LEFT JOIN dim_company c ON c.id = j.company_id
+            LEFT JOIN dim_area a ON a.id = j.area_id
+            LEFT JOIN dim_city ci ON ci.id = a.city_id
+            LEFT JOIN dim_experience ex ON ex.id = j.experience_id
+            LEFT JOIN dim_education ed ON ed.id = j.education_id
+            LEFT JOIN dim_keyword k ON k.id = j.keyword_id
+        ''')
+        
+        # 创建MinHash签名表和LSH分桶表（近似重复检测）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_minhash (
+                job_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        ''')
+        # 旧版分桶不区分公司，删除后由启动时的补算重新生成
+        cursor.execute('PRAGMA table_info(lsh_buckets)')
+        bucket_columns = [row[1] for row in cursor.fetchall()]
+        if bucket_columns and 'company_id' not in bucket_columns:
+            cursor.execute('DROP TABLE lsh_buckets')
+            cursor.execute('DELETE FROM job_minhash')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                bucket INTEGER NOT NULL,
+                company_id INTEGER,
+                job_id INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_lsh_company_bucket ON lsh_buckets(company_id, bucket)')
+        # 按岗位删除分桶（重新计算签名、归档、重放）时使用
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_lsh_job ON lsh_buckets(job_id)')
+        
+        # 创建统计草图表（按关键词、日期保存可合并的HyperLogLog和t-digest）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sketches (
+                keyword TEXT NOT NULL,
+                day TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                companies BLOB NOT NULL,
+                salaries TEXT NOT NULL,
+                PRIMARY KEY (keyword, day)
+            )
+        ''')
+        
+        # 创建保留策略表（按关键词配置热数据保留天数）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS retention_policies (
+                keyword TEXT PRIMARY KEY,
+                days INTEGER NOT NULL
+            )
+        ''')
+        
         conn.commit()
         conn.close()
+        
+        if migrate:
+            self.incremental_vacuum()
+    
+    def _create_jobs_table(self, conn: sqlite3.Connection):
+        """创建岗位表"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                company_id INTEGER,
+                salary TEXT,
+                area_id INTEGER,
+                experience_id INTEGER,
+                education_id INTEGER,
+                description TEXT,
+                keyword_id INTEGER,
+                crawl_time TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                cluster_id INTEGER
+            )
+        ''')
+    
+    def _migrate_legacy_jobs(self, conn: sqlite3.Connection, resume: bool, batch_size: int = 5000):
+        """把旧版岗位表的文本列转换成维度ID，保留原岗位ID；resume 表示从上次中断留下的 jobs_legacy 继续"""
+        # 整个迁移在一个显式事务中完成（SQLite的DDL也是事务性的），中途失败或进程退出都会整体回滚
+        conn.execute('BEGIN')
+        try:
+            if not resume:
+                conn.execute('DROP VIEW IF EXISTS v_jobs')
+                conn.execute('ALTER TABLE jobs RENAME TO jobs_legacy')
+            for index in ('idx_keyword', 'idx_title', 'idx_crawl_time'):
+                conn.execute(f'DROP INDEX IF EXISTS {index}')
+            self._create_jobs_table(conn)
+            
+            legacy_columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs_legacy)').fetchall()]
+            cluster_column = 'cluster_id' if 'cluster_id' in legacy_columns else 'NULL'
+            # 中断后新表里可能已经写入了岗位，ID冲突的旧岗位重新分配ID
+            taken_ids = {row[0] for row in conn.execute('SELECT id FROM jobs')} if resume else set()
+            last_id = 0
+            
+            while True:
+                rows = conn.execute(f'''
+                    SELECT id, title, company, salary, area, experience, education, description,
+                           keyword, crawl_time, created_at, {cluster_column}
+                    FROM jobs_legacy WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                
+                values = []
+                for row in rows:
+                    ids = self._dimension_ids(conn, {
+                        'company': row[2], 'area': row[4], 'experience': row[5],
+                        'education': row[6], 'keyword': row[8]
+                    })
+                    values.append((
+                        None if row[0] in taken_ids else row[0], row[1], ids['company'], row[3],
+                        ids['area'], ids['experience'], ids['education'], row[7], ids['keyword'],
+                        row[9], row[10], row[11]
+                    ))
+                
+                conn.executemany('''
+                    INSERT INTO jobs (id, title, company_id, salary, area_id, experience_id, education_id,
+                                      description, keyword_id, crawl_time, created_at, cluster_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', values)
+                last_id = rows[-1][0]
+            
+            conn.execute('DROP TABLE jobs_legacy')
+            conn.commit()
+        except Exception as e:
+            print(f"迁移旧版岗位表出错: {str(e)}")
+            conn.rollback()
+            # 回滚后缓存中的维度ID可能已不存在
+            self.dimensions.clear()
+            raise
+    
+    def _dimension_ids(self, conn: sqlite3.Connection, job: Dict) -> Dict[str, Optional[int]]:
+        """把岗位的维度文本转换成维度ID"""
+        return {
+            'company': self.dimensions.get_id(conn, 'company', job.get('company')),
+            'area': self.dimensions.get_area_id(conn, job.get('area')),
+            'experience': self.dimensions.get_id(conn, 'experience', job.get('experience')),
+            'education': self.dimensions.get_id(conn, 'education', job.get('education')),
+            'keyword': self.dimensions.get_id(conn, 'keyword', job.get('keyword')),
+        }
     
     def save_job(self, job: Dict) -> Optional[int]:
         """保存岗位数据"""
@@ -46,18 +222,22 @@ class Database:
         cursor = conn.cursor()
         
         try:
+            # 维度值单独提交，避免岗位写入失败回滚后缓存中留下不存在的ID
+            ids = self._dimension_ids(conn, job)
+            conn.commit()
+            
             cursor.execute('''
-                INSERT INTO jobs (title, company, salary, area, experience, education, description, keyword, crawl_time)
+                INSERT INTO jobs (title, company_id, salary, area_id, experience_id, education_id, description, keyword_id, crawl_time)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 job.get('title', ''),
-                job.get('company', ''),
+                ids['company'],
                 job.get('salary', ''),
-                job.get('area', ''),
-                job.get('experience', ''),
-                job.get('education', ''),
+                ids['area'],
+                ids['experience'],
+                ids['education'],
                 job.get('description', ''),
-                job.get('keyword', ''),
+                ids['keyword'],
                 job.get('crawl_time', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
             ))
             
@@ -71,6 +251,35 @@ class Database:
         finally:
             conn.close()
     
+    def delete_jobs_by_crawl_times(self, keyword: str, crawl_times: List[str]) -> int:
+        """删除指定关键词（精确匹配）在给定爬取时间抓取的岗位"""
+        if not crawl_times:
+            return 0
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            placeholders = ', '.join('?' for _ in crawl_times)
+            cursor.execute(f'''
+                SELECT id FROM jobs
+                WHERE keyword_id IN (SELECT id FROM dim_keyword WHERE name = ?)
+                AND crawl_time IN ({placeholders})
+            ''', [keyword, *crawl_times])
+            job_ids = [row[0] for row in cursor.fetchall()]
+            
+            # 同时删除这些岗位的MinHash签名和分桶（按岗位ID走索引）
+            for table, column in (('jobs', 'id'), ('job_minhash', 'job_id'), ('lsh_buckets', 'job_id')):
+                cursor.executemany(f'DELETE FROM {table} WHERE {column} = ?', [(job_id,) for job_id in job_ids])
+            conn.commit()
+            return len(job_ids)
+        except Exception as e:
+            print(f"删除岗位数据出错: {str(e)}")
+            conn.rollback()
+            return 0
+        finally:
+            conn.close()
+    
     def get_jobs_by_keyword(self, keyword: str, limit: int = 100) -> List[Dict]:
         """根据关键词查询岗位"""
         conn = sqlite3.connect(self.db_path)
@@ -79,8 +288,8 @@ class Database:
         
         try:
             cursor.execute('''
-                SELECT * FROM jobs 
-                WHERE keyword LIKE ? 
+                SELECT * FROM v_jobs 
+                WHERE keyword_id IN (SELECT id FROM dim_keyword WHERE name LIKE ?) 
                 ORDER BY crawl_time DESC 
                 LIMIT ?
             ''', (f'%{keyword}%', limit))
@@ -94,17 +303,21 @@ class Database:
         finally:
             conn.close()
     
-    def get_all_jobs(self, keyword: Optional[str] = None) -> List[Dict]:
-        """获取所有岗位或指定关键词的岗位"""
+    def get_all_jobs(self, keyword: Optional[str] = None, exact: bool = False) -> List[Dict]:
+        """获取所有岗位或指定关键词的岗位，exact 为True时关键词精确匹配"""
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         try:
             if keyword:
-                cursor.execute('SELECT * FROM jobs WHERE keyword LIKE ? ORDER BY crawl_time DESC', (f'%{keyword}%',))
+                cursor.execute(f'''
+                    SELECT * FROM v_jobs
+                    WHERE keyword_id IN (SELECT id FROM dim_keyword WHERE name {'=' if exact else 'LIKE'} ?)
+                    ORDER BY crawl_time DESC
+                ''', (keyword if exact else f'%{keyword}%',))
             else:
-                cursor.execute('SELECT * FROM jobs ORDER BY crawl_time DESC')
+                cursor.execute('SELECT * FROM v_jobs ORDER BY crawl_time DESC')
             
             rows = cursor.fetchall()
             jobs = [dict(row) for row in rows]
@@ -115,25 +328,106 @@ class Database:
         finally:
             conn.close()
     
+    def get_jobs_for_analysis(self, keyword: str) -> List[Dict]:
+        """获取分析用的岗位：只读取岗位表本身的列（维度为整数ID），不关联维度表"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT id, title, salary, description, crawl_time, cluster_id,
+                       company_id, area_id, experience_id, education_id, keyword_id
+                FROM jobs
+                WHERE keyword_id IN (SELECT id FROM dim_keyword WHERE name LIKE ?)
+                ORDER BY crawl_time DESC
+            ''', (f'%{keyword}%',))
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"查询岗位数据出错: {str(e)}")
+            return []
+        finally:
+            conn.close()
+    
+    def get_jobs_by_ids(self, job_ids: List[int]) -> List[Dict]:
+        """根据岗位ID查询带维度名称的完整岗位，按传入顺序返回"""
+        if not job_ids:
+            return []
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            placeholders = ', '.join('?' for _ in job_ids)
+            cursor.execute(f'SELECT * FROM v_jobs WHERE id IN ({placeholders})', job_ids)
+            jobs = {row['id']: dict(row) for row in cursor.fetchall()}
+            return [jobs[job_id] for job_id in job_ids if job_id in jobs]
+        except Exception as e:
+            print(f"查询岗位数据出错: {str(e)}")
+            return []
+        finally:
+            conn.close()
+    
+    def match_keyword_ids(self, keywords: List[str]) -> Dict[str, List[int]]:
+        """查找每个关键词（LIKE匹配）对应的关键词维度ID"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            matches = {}
+            for keyword in keywords:
+                cursor.execute('SELECT id FROM dim_keyword WHERE name LIKE ?', (f'%{keyword}%',))
+                matches[keyword] = [row[0] for row in cursor.fetchall()]
+            return matches
+        except Exception as e:
+            print(f"查询关键词出错: {str(e)}")
+            return {keyword: [] for keyword in keywords}
+        finally:
+            conn.close()
+    
+    def get_jobs_by_keyword_ids(self, keyword_ids: List[int], columns: List[str]) -> List[tuple]:
+        """一次查询取出属于任一关键词ID的岗位，只返回指定列"""
+        if not keyword_ids:
+            return []
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            placeholders = ', '.join('?' for _ in keyword_ids)
+            cursor.execute(
+                f'SELECT {", ".join(columns)} FROM jobs WHERE keyword_id IN ({placeholders})',
+                keyword_ids
+            )
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"查询岗位数据出错: {str(e)}")
+            return []
+        finally:
+            conn.close()
+    
     def get_statistics(self, keyword: str) -> Dict:
         """获取统计信息"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
+            keyword_filter = 'keyword_id IN (SELECT id FROM dim_keyword WHERE name LIKE ?)'
+            
             # 总岗位数
-            cursor.execute('SELECT COUNT(*) FROM jobs WHERE keyword LIKE ?', (f'%{keyword}%',))
+            cursor.execute(f'SELECT COUNT(*) FROM jobs WHERE {keyword_filter}', (f'%{keyword}%',))
             total_count = cursor.fetchone()[0]
             
             # 公司数量
-            cursor.execute('SELECT COUNT(DISTINCT company) FROM jobs WHERE keyword LIKE ?', (f'%{keyword}%',))
+            cursor.execute(f'SELECT COUNT(DISTINCT company_id) FROM jobs WHERE {keyword_filter}', (f'%{keyword}%',))
             company_count = cursor.fetchone()[0]
             
             # 薪资分布
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT salary, COUNT(*) as count 
                 FROM jobs 
-                WHERE keyword LIKE ? AND salary != '' AND salary != '面议'
+                WHERE {keyword_filter} AND salary != '' AND salary != '面议'
                 GROUP BY salary 
                 ORDER BY count DESC 
                 LIMIT 10
@@ -143,11 +437,245 @@ class Database:
             return {
                 'total_count': total_count,
                 'company_count': company_count,
-                'salary_distribution': salary_dist
+                'salary_distribution': salary_dist,
+                'city_distribution': self._dimension_counts(conn, keyword, 'city', 10),
+                'area_distribution': self._dimension_counts(conn, keyword, 'area', 10),
+                'experience_distribution': self._dimension_counts(conn, keyword, 'experience'),
+                'education_distribution': self._dimension_counts(conn, keyword, 'education')
             }
         except Exception as e:
             print(f"获取统计信息出错: {str(e)}")
             return {}
         finally:
             conn.close()
-
+    
+    def _dimension_counts(self, conn: sqlite3.Connection, keyword: str, dimension: str,
+                          top_n: Optional[int] = None) -> List[Dict]:
+        """按维度ID分组计数，只对前N个结果取回名称"""
+        if dimension == 'city':
+            source = 'jobs j JOIN dim_area a ON a.id = j.area_id'
+            column = 'a.city_id'
+        else:
+            source = 'jobs j'
+            column = f'j.{dimension}_id'
+        
+        rows = conn.execute(f'''
+            SELECT {column}, COUNT(*) AS count
+            FROM {source}
+            WHERE j.keyword_id IN (SELECT id FROM dim_keyword WHERE name LIKE ?) AND {column} IS NOT NULL
+            GROUP BY {column}
+            ORDER BY count DESC
+            LIMIT ?
+        ''', (f'%{keyword}%', top_n or -1)).fetchall()
+        
+        names = self.dimensions.get_names(conn, dimension, [row[0] for row in rows])
+        return [{dimension: names.get(row[0], ''), 'count': row[1]} for row in rows]
+    
+    def get_dimension_names(self, dimension: str, value_ids: List[int]) -> Dict[int, str]:
+        """根据维度ID批量取回名称（优先使用内存缓存）"""
+        conn = sqlite3.connect(self.db_path)
+        
+        try:
+            return self.dimensions.get_names(conn, dimension, value_ids)
+        finally:
+            conn.close()
+    
+    def find_dimension_ids(self, dimension: str, names: List[str]) -> Dict[str, int]:
+        """根据名称批量查找已有的维度ID（只查询，不新增维度值）"""
+        conn = sqlite3.connect(self.db_path)
+        
+        try:
+            return self.dimensions.find_ids(conn, dimension, names)
+        except Exception as e:
+            print(f"查询维度出错: {str(e)}")
+            return {}
+        finally:
+            conn.close()
+    
+    def get_area_city_ids(self, area_ids: List[int]) -> Dict[int, int]:
+        """根据地区ID查询所属城市ID"""
+        if not area_ids:
+            return {}
+        
+        conn = sqlite3.connect(self.db_path)
+        
+        try:
+            placeholders = ', '.join('?' for _ in area_ids)
+            rows = conn.execute(
+                f'SELECT id, city_id FROM dim_area WHERE id IN ({placeholders}) AND city_id IS NOT NULL',
+                list(area_ids)
+            ).fetchall()
+            return dict(rows)
+        except Exception as e:
+            print(f"查询地区出错: {str(e)}")
+            return {}
+        finally:
+            conn.close()
+    
+    def get_minhash_candidates(self, job_id: int, buckets: List[int], limit: int = 50) -> List[Dict]:
+        """查找同一公司中与任一LSH桶相同的岗位，按命中桶数取前 limit 个，返回其簇ID和签名"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            # 同一公司的岗位才认为是重复发布，公司在SQL中过滤，避免模板化文本形成的大桶全部载入
+            placeholders = ', '.join('?' for _ in buckets)
+            cursor.execute(f'''
+                SELECT b.job_id, COALESCE(j.cluster_id, j.id) AS cluster_id, m.signature
+                FROM (
+                    SELECT job_id, COUNT(*) AS hits FROM lsh_buckets
+                    WHERE company_id IS (SELECT company_id FROM jobs WHERE id = ?)
+                    AND bucket IN ({placeholders}) AND job_id != ?
+                    GROUP BY job_id
+                    ORDER BY hits DESC
+                    LIMIT ?
+                ) b
+                JOIN jobs j ON j.id = b.job_id
+                JOIN job_minhash m ON m.job_id = b.job_id
+            ''', [job_id, *buckets, job_id, limit])
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"查询近似重复候选出错: {str(e)}")
+            return []
+        finally:
+            conn.close()
+    
+    def save_minhash(self, job_id: int, cluster_id: int, signature: bytes, buckets: List[int]) -> bool:
+        """保存岗位的MinHash签名、LSH分桶和簇ID"""
+        conn = sqlite3.connect(self.db_path)
+        
+        try:
+            conn.execute('UPDATE jobs SET cluster_id = ? WHERE id = ?', (cluster_id, job_id))
+            conn.execute('INSERT OR REPLACE INTO job_minhash (job_id, signature) VALUES (?, ?)', (job_id, signature))
+            conn.execute('DELETE FROM lsh_buckets WHERE job_id = ?', (job_id,))
+            conn.executemany(
+                'INSERT INTO lsh_buckets (bucket, company_id, job_id) SELECT ?, company_id, id FROM jobs WHERE id = ?',
+                [(bucket, job_id) for bucket in buckets]
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            print(f"保存MinHash签名出错: {str(e)}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def get_jobs_without_minhash(self, limit: int = 1000, after_id: int = 0) -> List[Dict]:
+        """获取ID大于 after_id 且还没有MinHash签名的岗位"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT id, title, description FROM jobs
+                WHERE id > ? AND id NOT IN (SELECT job_id FROM job_minhash)
+                ORDER BY id
+                LIMIT ?
+            ''', (after_id, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"查询岗位数据出错: {str(e)}")
+            return []
+        finally:
+            conn.close()
+    
+    def get_sketch(self, keyword: str, day: str) -> Optional[Dict]:
+        """获取某个关键词某一天的统计草图"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('SELECT * FROM sketches WHERE keyword = ? AND day = ?', (keyword, day))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+    
+    def get_sketches(self, keyword: str) -> List[Dict]:
+        """获取匹配关键词的所有统计草图"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('SELECT * FROM sketches WHERE keyword LIKE ?', (f'%{keyword}%',))
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"查询统计草图出错: {str(e)}")
+            return []
+        finally:
+            conn.close()
+    
+    def save_sketch(self, keyword: str, day: str, total: int, companies: bytes, salaries: str):
+        """保存统计草图"""
+        conn = sqlite3.connect(self.db_path)
+        
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO sketches (keyword, day, total, companies, salaries)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (keyword, day, total, companies, salaries))
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def delete_sketches(self, keyword: Optional[str] = None):
+        """删除指定关键词（精确匹配）的统计草图，不传关键词时全部删除"""
+        conn = sqlite3.connect(self.db_path)
+        
+        try:
+            if keyword is None:
+                conn.execute('DELETE FROM sketches')
+            else:
+                conn.execute('DELETE FROM sketches WHERE keyword = ?', (keyword,))
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def set_retention_policy(self, keyword: str, days: int) -> bool:
+        """设置关键词的保留天数"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                INSERT INTO retention_policies (keyword, days) VALUES (?, ?)
+                ON CONFLICT(keyword) DO UPDATE SET days = excluded.days
+            ''', (keyword, days))
+            conn.commit()
+            return True
+        except Exception as e:
+            print(f"设置保留策略出错: {str(e)}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def get_retention_policies(self) -> Dict[str, int]:
+        """获取所有关键词的保留天数"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('SELECT keyword, days FROM retention_policies')
+            return {row[0]: row[1] for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"查询保留策略出错: {str(e)}")
+            return {}
+        finally:
+            conn.close()
+    
+    def incremental_vacuum(self):
+        """回收已删除数据占用的空闲页"""
+        conn = sqlite3.connect(self.db_path)
+        
+        try:
+            # 每一步只释放一页，需要取完结果才能回收全部空闲页
+            conn.execute('PRAGMA incremental_vacuum').fetchall()
+            conn.commit()
+        finally:
+            conn.close()
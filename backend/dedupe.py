@@ -0,0 +1,107 @@
+import hashlib
+from typing import Dict, List, Optional
+
+import jieba
+import numpy as np
+
+from database import Database
+
+# MinHash使用的梅森素数，哈希值截断到32位，保证乘法不会溢出
+_PRIME = (1 << 31) - 1
+
+class NearDuplicateDetector:
+    """近似重复岗位检测：标题+描述的jieba分词shingle做MinHash签名，LSH分桶查找候选"""
+    
+    def __init__(self, db: Database, num_perm: int = 128, bands: int = 32,
+                 threshold: float = 0.8, max_candidates: int = 50, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm 必须是 bands 的整数倍")
+        
+        self.db = db
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        # 每个岗位最多比较的候选数，避免模板化文本形成的大桶使入库退化为O(n²)
+        self.max_candidates = max_candidates
+        
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _PRIME, size=num_perm, dtype=np.int64)
+        self.b = rng.randint(0, _PRIME, size=num_perm, dtype=np.int64)
+    
+    def assign_clusters(self, jobs: List[Dict]) -> Dict[int, int]:
+        """为新入库的岗位分配簇ID，jobs 中需要包含 id，返回成功保存的 {岗位ID: 簇ID}"""
+        clusters = {}
+        for job in jobs:
+            signature = self.signature(f"{job.get('title', '')} {job.get('description', '')}")
+            buckets = self._band_buckets(signature)
+            
+            cluster_id = job['id']
+            best_similarity = self.threshold
+            for candidate in self.db.get_minhash_candidates(job['id'], buckets, self.max_candidates):
+                candidate_signature = np.frombuffer(candidate['signature'], dtype=np.int64)
+                similarity = float(np.mean(signature == candidate_signature))
+                if similarity >= best_similarity:
+                    best_similarity = similarity
+                    cluster_id = candidate['cluster_id']
+            
+            if self.db.save_minhash(job['id'], cluster_id, signature.tobytes(), buckets):
+                clusters[job['id']] = cluster_id
+        
+        return clusters
+    
+    def backfill(self, batch_size: int = 1000) -> int:
+        """为还没有签名的历史岗位补算簇ID，保存失败的岗位跳过，不会重复处理"""
+        total = 0
+        last_id = 0
+        while True:
+            jobs = self.db.get_jobs_without_minhash(batch_size, last_id)
+            if not jobs:
+                break
+            total += len(self.assign_clusters(jobs))
+            last_id = jobs[-1]['id']
+        return total
+    
+    def signature(self, text: str) -> np.ndarray:
+        """计算文本的MinHash签名"""
+        hashes = np.array(
+            [self._hash(shingle) & 0xFFFFFFFF for shingle in self._shingles(text)],
+            dtype=np.int64
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _PRIME, dtype=np.int64)
+        
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+    
+    def _shingles(self, text: str) -> set:
+        """分词后相邻两个词组成一个shingle，词太少时退化为单词"""
+        words = [w.strip().lower() for w in jieba.cut(text) if w.strip()]
+        if len(words) < 2:
+            return set(words)
+        return {f"{a} {b}" for a, b in zip(words, words[1:])}
+    
+    def _band_buckets(self, signature: np.ndarray) -> List[int]:
+        """把签名切成若干band，每个band哈希成一个桶（桶值包含band序号）"""
+        return [
+            self._hash(f"{band}:" + ",".join(map(str, signature[band * self.rows:(band + 1) * self.rows])))
+            for band in range(self.bands)
+        ]
+    
+    @staticmethod
+    def _hash(value: str) -> int:
+        """64位有符号哈希，便于存入SQLite的INTEGER列"""
+        return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+def dedupe_by_cluster(jobs: List[Dict], seen: Optional[set] = None) -> List[Dict]:
+    """每个簇只保留第一条岗位，没有簇ID的岗位自成一簇；分批调用时传入同一个 seen"""
+    seen = set() if seen is None else seen
+    result = []
+    for job in jobs:
+        cluster_id = job.get('cluster_id') or job.get('id')
+        if cluster_id is not None:
+            if cluster_id in seen:
+                continue
+            seen.add(cluster_id)
+        result.append(job)
+    return result
@@ -0,0 +1,116 @@
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 维度名 -> 维度表
+DIMENSION_TABLES = {
+    'company': 'dim_company',
+    'experience': 'dim_experience',
+    'education': 'dim_education',
+    'keyword': 'dim_keyword',
+    'city': 'dim_city',
+    'area': 'dim_area',
+}
+
+# 地区中城市和区县之间的分隔符，如 "北京·朝阳区"、"北京-朝阳区"
+_AREA_SEPARATORS = re.compile(r'\s*[·・\-—/\s]\s*')
+
+def normalize_area(area: str) -> str:
+    """规范化地区名称：统一分隔符，城市去掉"市"后缀，保留全部层级，如 "深圳市 南山区 科技园" -> "深圳·南山区·科技园" """
+    return '·'.join(_area_parts(area))
+
+def canonicalize_area(area: str) -> Tuple[str, str]:
+    """把地区拆成 (城市, 区县)，如 "北京·朝阳区·望京" -> ("北京", "朝阳区")，"北京市" -> ("北京", "")"""
+    parts = _area_parts(area)
+    if not parts:
+        return '', ''
+    return parts[0], parts[1] if len(parts) > 1 else ''
+
+def _area_parts(area: str) -> List[str]:
+    parts = [p for p in _AREA_SEPARATORS.split((area or '').strip()) if p]
+    if parts and parts[0].endswith('市') and len(parts[0]) > 2:
+        parts[0] = parts[0][:-1]
+    return parts
+
+class DimensionCache:
+    """维度值与整数ID的内存字典缓存，未命中时写入维度表"""
+    
+    def __init__(self):
+        self._ids = {name: {} for name in DIMENSION_TABLES}
+        self._names = {name: {} for name in DIMENSION_TABLES}
+        self._lock = threading.Lock()
+    
+    def get_id(self, conn: sqlite3.Connection, dimension: str, value: Optional[str]) -> Optional[int]:
+        """获取普通维度值的ID，空值返回None"""
+        if not value:
+            return None
+        return self._lookup(conn, dimension, value, 'INSERT OR IGNORE INTO {table} (name) VALUES (?)', (value,))
+    
+    def get_area_id(self, conn: sqlite3.Connection, area: Optional[str]) -> Optional[int]:
+        """获取地区ID，名称保留规范化后的完整地区，城市和区县另存为附加列"""
+        city, district = canonicalize_area(area)
+        if not city:
+            return None
+        
+        city_id = self.get_id(conn, 'city', city)
+        name = normalize_area(area)
+        return self._lookup(
+            conn, 'area', name,
+            'INSERT OR IGNORE INTO {table} (name, city_id, district) VALUES (?, ?, ?)',
+            (name, city_id, district)
+        )
+    
+    def get_names(self, conn: sqlite3.Connection, dimension: str, value_ids: Iterable[int]) -> Dict[int, str]:
+        """批量根据ID取回维度值，只查询缓存中没有的ID"""
+        names = self._names[dimension]
+        missing = [i for i in set(value_ids) if i is not None and i not in names]
+        if missing:
+            placeholders = ', '.join('?' for _ in missing)
+            rows = conn.execute(
+                f'SELECT id, name FROM {DIMENSION_TABLES[dimension]} WHERE id IN ({placeholders})',
+                missing
+            ).fetchall()
+            with self._lock:
+                for value_id, name in rows:
+                    names[value_id] = name
+                    self._ids[dimension][name] = value_id
+        return {i: names[i] for i in value_ids if i in names}
+    
+    def find_ids(self, conn: sqlite3.Connection, dimension: str, names: Iterable[str]) -> Dict[str, int]:
+        """按名称批量查找已有的维度ID，只查询不写入，维度表中没有的名称不返回"""
+        names = [name for name in set(names) if name]
+        ids = self._ids[dimension]
+        missing = [name for name in names if name not in ids]
+        if missing:
+            placeholders = ', '.join('?' for _ in missing)
+            rows = conn.execute(
+                f'SELECT id, name FROM {DIMENSION_TABLES[dimension]} WHERE name IN ({placeholders})',
+                missing
+            ).fetchall()
+            with self._lock:
+                for value_id, name in rows:
+                    ids[name] = value_id
+                    self._names[dimension][value_id] = name
+        return {name: ids[name] for name in names if name in ids}
+    
+    def clear(self):
+        """清空缓存（写入维度表的事务回滚后使用）"""
+        with self._lock:
+            for name in DIMENSION_TABLES:
+                self._ids[name].clear()
+                self._names[name].clear()
+    
+    def _lookup(self, conn: sqlite3.Connection, dimension: str, name: str,
+                insert_sql: str, params: tuple) -> int:
+        value_id = self._ids[dimension].get(name)
+        if value_id is not None:
+            return value_id
+        
+        table = DIMENSION_TABLES[dimension]
+        with self._lock:
+            conn.execute(insert_sql.format(table=table), params)
+            value_id = conn.execute(f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()[0]
+            self._ids[dimension][name] = value_id
+            self._names[dimension][value_id] = name
+        return value_id
@@ -0,0 +1,147 @@
+from bs4 import BeautifulSoup
+import time
+from typing import List, Dict
+import json
+import re
+
+class JobParser:
+    """岗位页面解析类（纯CPU计算，可在子进程中运行）"""
+    
+    def parse(self, html: str, keyword: str = "") -> List[Dict]:
+        """从HTML中解析岗位信息"""
+        jobs = []
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Boss直聘的页面结构（需要根据实际页面调整选择器）
+        job_items = (soup.find_all('div', class_='job-primary') or 
+                    soup.find_all('li', class_='job-card-wrapper') or
+                    soup.find_all('div', class_='job-card') or
+                    soup.find_all('li', class_='job-item'))
+        
+        if not job_items:
+            # 尝试查找JSON数据
+            script_tags = soup.find_all('script')
+            for script in script_tags:
+                if script.string:
+                    # 尝试提取JSON数据
+                    json_patterns = [
+                        r'window\.__INITIAL_STATE__\s*=\s*({.+?});',
+                        r'jobList\s*[:=]\s*(\[.+?\])',
+                        r'geekList\s*[:=]\s*(\[.+?\])'
+                    ]
+                    for pattern in json_patterns:
+                        json_match = re.search(pattern, script.string, re.DOTALL)
+                        if json_match:
+                            try:
+                                data = json.loads(json_match.group(1))
+                                parsed_jobs = self._parse_from_json(data, keyword)
+                                if parsed_jobs:
+                                    return parsed_jobs
+                            except:
+                                pass
+        
+        # 解析HTML中的岗位信息
+        for item in job_items[:30]:  # 限制每页最多30条
+            try:
+                job = self._extract_job_info(item, keyword)
+                if job:
+                    jobs.append(job)
+            except Exception as e:
+                print(f"解析岗位信息出错: {str(e)}")
+                continue
+        
+        return jobs
+    
+    def _extract_job_info(self, item, keyword: str = "") -> Dict:
+        """提取单个岗位信息"""
+        job = {}
+        
+        try:
+            # 岗位名称 - 尝试多种选择器
+            title_elem = (item.find('a', class_='job-title') or 
+                         item.find('span', class_='job-name') or
+                         item.find('div', class_='job-name') or
+                         item.find('h3'))
+            job['title'] = title_elem.get_text(strip=True) if title_elem else f"{keyword}相关岗位"
+            
+            # 公司名称
+            company_elem = (item.find('a', class_='company-name') or 
+                          item.find('div', class_='company-text') or
+                          item.find('div', class_='company-name'))
+            job['company'] = company_elem.get_text(strip=True) if company_elem else "未知公司"
+            
+            # 薪资
+            salary_elem = (item.find('span', class_='salary') or 
+                          item.find('span', class_='red') or
+                          item.find('div', class_='salary'))
+            job['salary'] = salary_elem.get_text(strip=True) if salary_elem else "面议"
+            
+            # 工作地点
+            area_elem = (item.find('span', class_='job-area') or 
+                        item.find('span', class_='area') or
+                        item.find('div', class_='job-area'))
+            job['area'] = area_elem.get_text(strip=True) if area_elem else "未知地区"
+            
+            # 经验要求
+            exp_elem = item.find('span', class_='job-limit') or item.find('span', class_='exp')
+            job['experience'] = exp_elem.get_text(strip=True) if exp_elem else "不限"
+            
+            # 学历要求
+            edu_elem = item.find('span', class_='job-limit') or item.find('span', class_='edu')
+            job['education'] = edu_elem.get_text(strip=True) if edu_elem else "不限"
+            
+            # 岗位描述/标签
+            desc_elem = (item.find('div', class_='job-info') or 
+                        item.find('div', class_='info-desc') or
+                        item.find('p', class_='job-desc'))
+            job['description'] = desc_elem.get_text(strip=True) if desc_elem else ""
+            
+            # 添加关键词和爬取时间
+            job['keyword'] = keyword
+            job['crawl_time'] = time.strftime("%Y-%m-%d %H:%M:%S")
+            
+        except Exception as e:
+            print(f"提取岗位信息出错: {str(e)}")
+            return None
+        
+        return job
+    
+    def _parse_from_json(self, data: Dict, keyword: str = "") -> List[Dict]:
+        """从JSON数据中解析岗位（如果API返回JSON）"""
+        jobs = []
+        # 根据实际JSON结构实现
+        # Boss直聘的JSON结构可能包含在 jobList 或 geekList 中
+        try:
+            if isinstance(data, dict):
+                # 尝试找到岗位列表
+                job_list = (data.get('jobList', []) or 
+                           data.get('geekList', []) or 
+                           data.get('data', {}).get('jobList', []))
+                
+                for item in job_list:
+                    if isinstance(item, dict):
+                        job = {
+                            'title': item.get('jobName') or item.get('title') or f"{keyword}相关岗位",
+                            'company': item.get('brandName') or item.get('company') or '未知公司',
+                            'salary': item.get('salaryDesc') or item.get('salary') or '面议',
+                            'area': item.get('cityName') or item.get('area') or '未知地区',
+                            'experience': item.get('experienceName') or item.get('experience') or '不限',
+                            'education': item.get('degreeName') or item.get('education') or '不限',
+                            'description': item.get('jobDesc') or item.get('description') or '',
+                            'keyword': keyword,
+                            'crawl_time': time.strftime("%Y-%m-%d %H:%M:%S")
+                        }
+                        jobs.append(job)
+        except Exception as e:
+            print(f"解析JSON数据出错: {str(e)}")
+        
+        return jobs
+
+_parser = None
+
+def parse_page(html: str, keyword: str = "") -> List[Dict]:
+    """解析进程池的任务入口，每个子进程复用一个解析器实例"""
+    global _parser
+    if _parser is None:
+        _parser = JobParser()
+    return _parser.parse(html, keyword)
@@ -9,6 +9,9 @@ import asyncio
 from crawler import BossCrawler
 from analyzer import DataAnalyzer
 from database import Database
+from archive import ArchiveManager
+from raw_store import RawPageStore
+from dedupe import NearDuplicateDetector
 import os
 
 app = FastAPI(title="Boss直聘爬虫系统", version="1.0.0")
@@ -24,8 +27,21 @@ app.add_middleware(
 
 # 初始化组件
 db = Database()
-crawler = BossCrawler()
-analyzer = DataAnalyzer(db)
+crawler = BossCrawler(
+    fetch_concurrency=int(os.environ.get('CRAWL_CONCURRENCY', 1)),
+    parse_workers=int(os.environ.get('PARSE_WORKERS', 0)) or None,
+    raw_store=RawPageStore()
+)
+archive = ArchiveManager(db, default_retention_days=int(os.environ.get('RETENTION_DAYS', 90)))
+analyzer = DataAnalyzer(db, archive)
+deduper = NearDuplicateDetector(db)
+
+# 首次启用统计草图时根据已有数据补建
+if not db.get_sketches(''):
+    analyzer.rebuild_sketches()
+
+# 为历史岗位补算近似重复簇
+deduper.backfill()
 
 # 创建静态文件目录
 os.makedirs('static/wordclouds', exist_ok=True)
@@ -37,12 +53,53 @@ class CrawlRequest(BaseModel):
     keyword: str  # 岗位关键词
     max_pages: Optional[int] = 5  # 最大爬取页数
 
+class ReplayRequest(BaseModel):
+    keyword: Optional[str] = None  # 为空时重放全部关键词
+
+class RetentionRequest(BaseModel):
+    keyword: str  # 岗位关键词
+    days: int  # 热数据保留天数
+
 class CrawlResponse(BaseModel):
     success: bool
     message: str
     total_count: Optional[int] = None
     job_ids: Optional[List[int]] = None
 
+@app.on_event("shutdown")
+async def shutdown():
+    """关闭爬虫的解析进程池"""
+    crawler.close()
+
+def save_jobs(jobs: List[dict]) -> List[int]:
+    """保存岗位到数据库，返回成功保存的ID"""
+    job_ids = []
+    saved_jobs = []
+    for job in jobs:
+        job_id = db.save_job(job)
+        if job_id:
+            job_ids.append(job_id)
+            saved_jobs.append({**job, 'id': job_id})
+    
+    # 入库时增量更新统计草图，并分配近似重复簇
+    analyzer.record_jobs(saved_jobs)
+    deduper.assign_clusters(saved_jobs)
+    return job_ids
+
+def check_dedupe(dedupe: Optional[str]):
+    """校验去重参数"""
+    if dedupe not in (None, 'cluster'):
+        raise HTTPException(status_code=400, detail="dedupe 只支持 cluster")
+
+def check_approx(approx: bool, include_archive: Optional[bool], dedupe: Optional[str]):
+    """校验近似统计参数：统计草图总是包含归档数据，且没有去重"""
+    if not approx:
+        return
+    if include_archive is False:
+        raise HTTPException(status_code=400, detail="approx 统计包含归档数据，不能与 include_archive=false 同时使用")
+    if dedupe:
+        raise HTTPException(status_code=400, detail="approx 统计不支持 dedupe")
+
 @app.get("/")
 async def root():
     return {"message": "Boss直聘爬虫系统API", "status": "running"}
@@ -61,11 +118,7 @@ async def crawl_jobs(request: CrawlRequest):
             )
         
         # 保存到数据库
-        job_ids = []
-        for job in jobs:
-            job_id = db.save_job(job)
-            if job_id:
-                job_ids.append(job_id)
+        job_ids = save_jobs(jobs)
         
         return CrawlResponse(
             success=True,
@@ -76,29 +129,94 @@ async def crawl_jobs(request: CrawlRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"爬取失败: {str(e)}")
 
+@app.post("/api/replay")
+async def replay_pages(request: ReplayRequest):
+    """用当前解析器重新解析已保存的原始页面，重建岗位数据"""
+    try:
+        jobs_by_keyword, failed_pages = await crawler.replay(request.keyword)
+        
+        rebuilt = {}
+        skipped = {}
+        for keyword, jobs in jobs_by_keyword.items():
+            # 早于保留期的页面对应的岗位已经归档，不再放回热数据，避免与归档重复
+            cutoff = archive.retention_cutoff(keyword)
+            fresh_jobs = [job for job in jobs if job['crawl_time'] >= cutoff]
+            if len(fresh_jobs) < len(jobs):
+                skipped[keyword] = len(jobs) - len(fresh_jobs)
+            if not fresh_jobs:
+                continue
+            
+            # 只替换由重放页面产生的岗位（爬取时间等于页面抓取时间），没有原始页面的岗位保留
+            db.delete_jobs_by_crawl_times(keyword, sorted({job['crawl_time'] for job in fresh_jobs}))
+            rebuilt[keyword] = len(save_jobs(fresh_jobs))
+            # 草图无法减去被替换的岗位，按热数据和归档数据重建
+            await asyncio.to_thread(analyzer.rebuild_sketches, keyword)
+        
+        return {
+            "success": not failed_pages,
+            "message": f"重建 {len(rebuilt)} 个关键词的岗位数据，{len(failed_pages)} 个页面解析失败",
+            "rebuilt": rebuilt,
+            "skipped_archived": skipped,
+            "failed_pages": failed_pages
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重放失败: {str(e)}")
+
 @app.get("/api/stats/{keyword}")
-async def get_statistics(keyword: str):
-    """获取岗位统计数据"""
+async def get_statistics(keyword: str, include_archive: Optional[bool] = None, approx: bool = False,
+                         dedupe: Optional[str] = None):
+    """获取岗位统计数据，approx=true 时返回基于统计草图的近似结果（包含归档数据）"""
+    check_dedupe(dedupe)
+    check_approx(approx, include_archive, dedupe)
     try:
-        stats = analyzer.get_statistics(keyword)
+        if approx:
+            return analyzer.get_approx_statistics(keyword)
+        stats = analyzer.get_statistics(keyword, bool(include_archive), dedupe)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"统计失败: {str(e)}")
 
 @app.get("/api/analysis/{keyword}")
-async def get_analysis(keyword: str):
-    """获取岗位详细分析"""
+async def get_analysis(keyword: str, include_archive: Optional[bool] = None, approx: bool = False,
+                       dedupe: Optional[str] = None):
+    """获取岗位详细分析，approx=true 时只返回近似的薪资分位数（包含归档数据）"""
+    check_dedupe(dedupe)
+    check_approx(approx, include_archive, dedupe)
     try:
-        analysis = analyzer.get_detailed_analysis(keyword)
+        if approx:
+            return analyzer.get_approx_analysis(keyword)
+        analysis = analyzer.get_detailed_analysis(keyword, bool(include_archive), dedupe)
         return analysis
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"分析失败: {str(e)}")
 
+@app.get("/api/dashboard/{keyword}")
+async def get_dashboard(keyword: str, include_archive: bool = False, dedupe: Optional[str] = None,
+                        limit: int = 100):
+    """仪表盘数据：统计、详细分析、词云URL和岗位列表一次返回"""
+    check_dedupe(dedupe)
+    try:
+        return await analyzer.get_dashboard(keyword, include_archive, dedupe, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"加载仪表盘失败: {str(e)}")
+
+@app.get("/api/compare")
+async def compare_keywords(keywords: str):
+    """多关键词对比，keywords 以逗号分隔"""
+    keyword_list = list(dict.fromkeys(k.strip() for k in keywords.split(',') if k.strip()))
+    if not keyword_list:
+        raise HTTPException(status_code=400, detail="请提供至少一个关键词")
+    
+    try:
+        return analyzer.compare_keywords(keyword_list)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"对比失败: {str(e)}")
+
 @app.get("/api/wordcloud/{keyword}")
-async def generate_wordcloud(keyword: str):
+async def generate_wordcloud(keyword: str, include_archive: bool = False):
     """生成词云图"""
     try:
-        image_path = analyzer.generate_wordcloud(keyword)
+        image_path = analyzer.generate_wordcloud(keyword, include_archive)
         if os.path.exists(image_path):
             # 返回静态文件路径
             return FileResponse(
@@ -120,6 +238,31 @@ async def get_jobs(keyword: str, limit: int = 100):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
 
+@app.post("/api/archive/retention")
+async def set_retention(request: RetentionRequest):
+    """设置关键词的热数据保留天数"""
+    if request.days <= 0:
+        raise HTTPException(status_code=400, detail="保留天数必须大于0")
+    if not db.set_retention_policy(request.keyword, request.days):
+        raise HTTPException(status_code=500, detail="设置保留策略失败")
+    return {"keyword": request.keyword, "days": request.days}
+
+@app.get("/api/archive/retention")
+async def get_retention():
+    """获取保留策略"""
+    return {
+        "default_days": archive.default_retention_days,
+        "policies": db.get_retention_policies()
+    }
+
+@app.post("/api/archive/run")
+async def run_archive():
+    """归档超过保留期的岗位数据"""
+    try:
+        return await asyncio.to_thread(archive.run)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"归档失败: {str(e)}")
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from job_parser import parse_page
+
+try:
+    import zstandard
+except ImportError:  # 未安装zstandard时退回gzip
+    zstandard = None
+
+class RawPageStore:
+    """原始页面存储类：页面内容按哈希去重压缩保存，索引记录关键词、城市、页码和抓取时间"""
+    
+    def __init__(self, store_dir: str = "raw_pages"):
+        self.store_dir = store_dir
+        self.objects_dir = os.path.join(store_dir, "objects")
+        self.index_path = os.path.join(store_dir, "index.db")
+        self.codec = "zst" if zstandard else "gz"
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.init_index()
+    
+    def init_index(self):
+        """初始化页面索引表"""
+        conn = sqlite3.connect(self.index_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS raw_pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                keyword TEXT NOT NULL,
+                city TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                fetch_time TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                size INTEGER,
+                UNIQUE (keyword, city, page, fetch_time)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_raw_keyword ON raw_pages(keyword, fetch_time)')
+        
+        conn.commit()
+        conn.close()
+    
+    def save(self, html: str, keyword: str, city: str, page: int,
+             fetch_time: Optional[str] = None) -> Optional[str]:
+        """保存一次抓取的页面，返回内容哈希"""
+        fetch_time = fetch_time or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        body = html.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        
+        try:
+            # 相同内容只存一份
+            path = object_path(self.store_dir, digest, self.codec)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(_compress(body, self.codec))
+                os.replace(tmp_path, path)
+            
+            conn = sqlite3.connect(self.index_path)
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO raw_pages (keyword, city, page, fetch_time, digest, codec, size)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (keyword, city, page, fetch_time, digest, self.codec, len(body)))
+                conn.commit()
+            finally:
+                conn.close()
+            return digest
+        except Exception as e:
+            print(f"保存原始页面出错: {str(e)}")
+            return None
+    
+    def load(self, digest: str, codec: str) -> str:
+        """按内容哈希读取页面"""
+        return load_object(self.store_dir, digest, codec)
+    
+    def list_pages(self, keyword: Optional[str] = None) -> List[Dict]:
+        """列出已保存的页面，按抓取时间和页码排序"""
+        conn = sqlite3.connect(self.index_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            if keyword:
+                cursor.execute('''
+                    SELECT * FROM raw_pages WHERE keyword = ?
+                    ORDER BY fetch_time, page
+                ''', (keyword,))
+            else:
+                cursor.execute('SELECT * FROM raw_pages ORDER BY fetch_time, page')
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"查询原始页面出错: {str(e)}")
+            return []
+        finally:
+            conn.close()
+    
+    def iter_pages(self, keyword: Optional[str] = None) -> Iterator[Tuple[Dict, str]]:
+        """逐个返回页面索引和内容，可用作解析器基准测试和测试用例的数据源"""
+        for record in self.list_pages(keyword):
+            yield record, self.load(record['digest'], record['codec'])
+
+def object_path(store_dir: str, digest: str, codec: str) -> str:
+    """页面文件路径，按哈希前两位分目录"""
+    return os.path.join(store_dir, "objects", digest[:2], f"{digest}.{codec}")
+
+def load_object(store_dir: str, digest: str, codec: str) -> str:
+    """读取并解压页面内容"""
+    with open(object_path(store_dir, digest, codec), 'rb') as f:
+        return _decompress(f.read(), codec).decode('utf-8')
+
+def parse_stored_page(store_dir: str, record: Dict) -> List[Dict]:
+    """重放任务入口：在解析进程中读取、解压并解析一个已保存的页面"""
+    try:
+        html = load_object(store_dir, record['digest'], record['codec'])
+    except Exception as e:
+        # 解压库的异常类不一定能跨进程序列化，转换成普通异常
+        raise ValueError(f"读取页面 {record['digest']} 失败: {str(e)}") from None
+    jobs = parse_page(html, record['keyword'])
+    # 重放得到的岗位使用原始抓取时间
+    for job in jobs:
+        job['crawl_time'] = record['fetch_time']
+    return jobs
+
+def _compress(body: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        return zstandard.ZstdCompressor(level=10).compress(body)
+    return gzip.compress(body)
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        if zstandard is None:
+            raise RuntimeError("读取zstd压缩的页面需要安装zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import math
+from typing import Dict, List, Optional
+
+from database import Database
+
+class HyperLogLog:
+    """HyperLogLog基数估计，用于统计不同公司数量，可合并"""
+    
+    def __init__(self, precision: int = 12, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+    
+    def add(self, value: str):
+        h = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = h >> (64 - self.precision)
+        rest = (h << self.precision) & ((1 << 64) - 1)
+        rank = 64 - self.precision + 1 if rest == 0 else 65 - rest.bit_length()
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def merge(self, other: 'HyperLogLog'):
+        for i, value in enumerate(other.registers):
+            if value > self.registers[i]:
+                self.registers[i] = value
+    
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -r for r in self.registers)
+        
+        # 小基数时使用线性计数修正
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+        
+        return int(round(estimate))
+    
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, precision: int = 12) -> 'HyperLogLog':
+        return cls(precision, data)
+
+class TDigest:
+    """t-digest分位数估计，用于薪资p50/p90/p99，可合并"""
+    
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.centroids = []  # [(均值, 权重)]，按均值排序
+        self.buffer = []
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def add(self, value: float, weight: float = 1):
+        self.buffer.append((value, weight))
+        self.count += weight
+        self.total += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= self.compression * 5:
+            self._compress()
+    
+    def merge(self, other: 'TDigest'):
+        other._compress()
+        self.buffer.extend(other.centroids)
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+    
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        
+        target = q * self.count
+        first_mean, first_weight = self.centroids[0]
+        if target < first_weight / 2:
+            return self._interpolate(self.min, first_mean, target / (first_weight / 2))
+        
+        cumulative = first_weight / 2
+        for (mean, weight), (next_mean, next_weight) in zip(self.centroids, self.centroids[1:]):
+            step = (weight + next_weight) / 2
+            if target <= cumulative + step:
+                return self._interpolate(mean, next_mean, (target - cumulative) / step)
+            cumulative += step
+        
+        last_mean, last_weight = self.centroids[-1]
+        fraction = (target - cumulative) / (last_weight / 2)
+        return self._interpolate(last_mean, self.max, min(fraction, 1.0))
+    
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+    
+    def to_json(self) -> str:
+        self._compress()
+        return json.dumps({
+            "compression": self.compression,
+            "centroids": self.centroids,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        })
+    
+    @classmethod
+    def from_json(cls, data: str) -> 'TDigest':
+        state = json.loads(data)
+        digest = cls(state['compression'])
+        digest.centroids = [tuple(c) for c in state['centroids']]
+        digest.count = state['count']
+        digest.total = state['total']
+        if digest.count:
+            digest.min = state['min']
+            digest.max = state['max']
+        return digest
+    
+    def _compress(self):
+        """把缓冲区合并进质心，质心大小受 k1 尺度函数限制"""
+        if not self.buffer:
+            return
+        
+        items = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        total_weight = sum(weight for _, weight in items)
+        
+        merged = []
+        mean, weight = items[0]
+        q0 = 0.0
+        q_limit = self._q_limit(q0)
+        for next_mean, next_weight in items[1:]:
+            if (q0 * total_weight + weight + next_weight) / total_weight <= q_limit:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                merged.append((mean, weight))
+                q0 += weight / total_weight
+                q_limit = self._q_limit(q0)
+                mean, weight = next_mean, next_weight
+        merged.append((mean, weight))
+        
+        self.centroids = merged
+    
+    def _q_limit(self, q0: float) -> float:
+        """从分位点 q0 开始，单个质心最多可以覆盖到的分位点"""
+        k = self.compression / (2 * math.pi) * math.asin(2 * min(max(q0, 0.0), 1.0) - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+    
+    @staticmethod
+    def _interpolate(low: float, high: float, fraction: float) -> float:
+        return low + (high - low) * fraction
+
+class SketchStore:
+    """按关键词和日期保存可合并的统计草图，在入库时增量更新"""
+    
+    def __init__(self, db: Database):
+        self.db = db
+    
+    def add(self, records: List[Dict]):
+        """记录新入库的岗位，records 中包含 keyword、day、company、salary_value"""
+        groups = {}
+        for record in records:
+            groups.setdefault((record['keyword'], record['day']), []).append(record)
+        
+        for (keyword, day), items in groups.items():
+            row = self.db.get_sketch(keyword, day)
+            total = row['total'] if row else 0
+            companies = HyperLogLog.from_bytes(row['companies']) if row else HyperLogLog()
+            salaries = TDigest.from_json(row['salaries']) if row else TDigest()
+            
+            for item in items:
+                total += 1
+                if item.get('company'):
+                    companies.add(item['company'])
+                if item.get('salary_value') is not None:
+                    salaries.add(item['salary_value'])
+            
+            self.db.save_sketch(keyword, day, total, companies.to_bytes(), salaries.to_json())
+    
+    def summary(self, keyword: str) -> Dict:
+        """合并所有匹配关键词、所有日期的草图，耗时与岗位数量无关"""
+        total = 0
+        companies = HyperLogLog()
+        salaries = TDigest()
+        
+        for row in self.db.get_sketches(keyword):
+            total += row['total']
+            companies.merge(HyperLogLog.from_bytes(row['companies']))
+            salaries.merge(TDigest.from_json(row['salaries']))
+        
+        return {
+            "total_jobs": total,
+            "company_count": companies.count(),
+            "salary_statistics": self._salary_summary(salaries)
+        }
+    
+    def _salary_summary(self, salaries: TDigest) -> Dict:
+        if not salaries.count:
+            return {"avg": 0, "min": 0, "max": 0}
+        
+        return {
+            "avg": round(salaries.mean(), 2),
+            "min": int(salaries.min),
+            "max": int(salaries.max),
+            "p50": round(salaries.quantile(0.5), 2),
+            "p90": round(salaries.quantile(0.9), 2),
+            "p99": round(salaries.quantile(0.99), 2)
+        }
@@ -1,6 +1,28 @@
-const API_BASE_URL = 'http://localhost:8000/api';
+const SERVER_BASE_URL = 'http://localhost:8000';
+const API_BASE_URL = `${SERVER_BASE_URL}/api`;
 
 let currentKeyword = '';
+let dashboardCache = { keyword: null, promise: null };
+
+// 加载仪表盘数据（同一关键词只请求一次，各标签页共用）
+function loadDashboard() {
+    if (dashboardCache.keyword !== currentKeyword || !dashboardCache.promise) {
+        dashboardCache.keyword = currentKeyword;
+        dashboardCache.promise = fetch(`${API_BASE_URL}/dashboard/${encodeURIComponent(currentKeyword)}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`请求失败，状态码: ${response.status}`);
+                }
+                return response.json();
+            })
+            .catch(error => {
+                // 失败后允许重新请求
+                dashboardCache.promise = null;
+                throw error;
+            });
+    }
+    return dashboardCache.promise;
+}
 
 // 显示标签页
 function showTab(tabName) {
@@ -62,6 +84,8 @@ async function startCrawl() {
         const data = await response.json();
         
         if (data.success) {
+            // 数据已更新，丢弃旧的仪表盘缓存
+            dashboardCache = { keyword: null, promise: null };
             progressBar.style.width = '100%';
             statusMessage.textContent = data.message;
             statusSection.style.background = '#d4edda';
@@ -98,8 +122,7 @@ async function loadStatistics() {
     content.innerHTML = '<div class="loading">加载中</div>';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/stats/${encodeURIComponent(currentKeyword)}`);
-        const data = await response.json();
+        const data = (await loadDashboard()).statistics;
         
         if (data.total_jobs === 0) {
             content.innerHTML = '<div class="error">暂无数据，请先爬取</div>';
@@ -183,8 +206,7 @@ async function loadAnalysis() {
     content.innerHTML = '<div class="loading">分析中</div>';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/analysis/${encodeURIComponent(currentKeyword)}`);
-        const data = await response.json();
+        const data = (await loadDashboard()).analysis;
         
         if (!data.total_jobs || data.total_jobs === 0) {
             content.innerHTML = '<div class="error">暂无数据，请先爬取</div>';
@@ -255,7 +277,14 @@ async function loadWordcloud() {
     content.innerHTML = '<div class="loading">生成词云中</div>';
     
     try {
-        const imgUrl = `${API_BASE_URL}/wordcloud/${encodeURIComponent(currentKeyword)}?t=${Date.now()}`;
+        const data = await loadDashboard();
+        
+        if (!data.wordcloud_url) {
+            content.innerHTML = '<div class="error">词云生成失败，请确保有数据</div>';
+            return;
+        }
+        
+        const imgUrl = `${SERVER_BASE_URL}${data.wordcloud_url}`;
         content.innerHTML = `
             <div style="text-align: center;">
                 <img src="${imgUrl}" alt="词云图" class="wordcloud-img" onerror="this.parentElement.innerHTML='<div class=\\'error\\'>词云生成失败，请确保有数据</div>'">
@@ -275,8 +304,7 @@ async function loadJobs() {
     content.innerHTML = '<div class="loading">加载中</div>';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/jobs/${encodeURIComponent(currentKeyword)}?limit=100`);
-        const data = await response.json();
+        const data = (await loadDashboard()).jobs;
         
         if (!data.jobs || data.jobs.length === 0) {
             content.innerHTML = '<div class="error">暂无数据，请先爬取</div>';